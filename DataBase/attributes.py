@@ -0,0 +1,27 @@
+import re
+
+# Разделители между словами характеристик, дефис остается частью слова (type-c)
+TOKEN_SPLIT = re.compile(r"[^\w-]+")
+TOKEN_LENGTH = 50
+
+
+def characteristic_tokens(characteristics: str) -> set:
+    """
+    Разбивает характеристики товара на слова для таблицы goods_attributes
+
+    :param characteristics: Текст характеристик, например "USB Type-C, 128 GB"
+    :return: Множество слов в нижнем регистре
+
+    Слова через дефис добавляются целиком и по частям,
+    поэтому "Micro-USB" находится и по "micro-usb", и по "micro".
+    """
+    tokens = set()
+
+    for word in TOKEN_SPLIT.split(characteristics.lower()):
+        word = word.strip("-")
+        if not word:
+            continue
+        tokens.add(word[:TOKEN_LENGTH])
+        tokens.update(part[:TOKEN_LENGTH] for part in word.split("-") if part)
+
+    return tokens
@@ -1,9 +1,13 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+import logging
 import os
 
-MY_URL_PYMYSQL = "mysql+pymysql://{USER}:{PASS}@{HOST}:{PORT}/{NAME}".format(
+MY_URL_AIOMYSQL = "mysql+aiomysql://{USER}:{PASS}@{HOST}:{PORT}/{NAME}".format(
     HOST=os.getenv("DB_HOST"),
     PORT=os.getenv("DB_PORT"),
     USER=os.getenv("DB_USER"),
@@ -11,12 +15,71 @@ MY_URL_PYMYSQL = "mysql+pymysql://{USER}:{PASS}@{HOST}:{PORT}/{NAME}".format(
     NAME=os.getenv("DB_NAME")
 
 )
-engine = create_engine(
-    url=MY_URL_PYMYSQL,
-    echo=True
+# DB_URL позволяет заменить MySQL, например на sqlite+aiosqlite:///bot.db для локального запуска
+DB_URL = make_url(os.getenv("DB_URL") or MY_URL_AIOMYSQL)
+
+# Синхронные драйверы для тех же баз данных (llama_index работает только с ними)
+SYNC_DRIVERS = {
+    "mysql+aiomysql": "mysql+pymysql",
+    "sqlite+aiosqlite": "sqlite"
+}
+
+engine_options = {"echo": os.getenv("DB_ECHO", "1") == "1"}
+pool_options = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20))
+}
+if DB_URL.get_backend_name() != "sqlite":
+    engine_options.update(pool_options, pool_recycle=3600, pool_pre_ping=True)
+elif DB_URL.database not in (None, "", ":memory:"):
+    # По умолчанию aiosqlite открывает новое соединение на каждую сессию
+    engine_options.update(pool_options, poolclass=AsyncAdaptedQueuePool)
+
+engine = create_async_engine(url=DB_URL, **engine_options)
+
+factory_session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Синхронный движок для SQLDatabase из llama_index
+sync_engine = create_engine(
+    url=DB_URL.set(drivername=SYNC_DRIVERS.get(DB_URL.drivername, DB_URL.drivername)),
+    echo=engine_options["echo"],
+    pool_pre_ping=True
 )
 
-factory_session = sessionmaker(engine)
+# Движок только для чтения для SQL, который генерирует LLM.
+# SQL_DB_URL позволяет указать отдельного пользователя MySQL только с правом SELECT
+SQL_DB_URL = make_url(os.getenv("SQL_DB_URL") or sync_engine.url)
+SQL_TIMEOUT = float(os.getenv("SQL_TIMEOUT", 5))
+
+readonly_engine = create_engine(
+    url=SQL_DB_URL,
+    echo=engine_options["echo"],
+    pool_pre_ping=True,
+    pool_size=2,
+    max_overflow=2
+) if SQL_DB_URL.get_backend_name() != "sqlite" else create_engine(url=SQL_DB_URL, echo=engine_options["echo"])
+
+
+@event.listens_for(readonly_engine, "connect")
+def set_readonly_session(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    if readonly_engine.dialect.name == "sqlite":
+        cursor.execute("PRAGMA query_only = ON")
+    else:
+        cursor.execute("SET SESSION TRANSACTION READ ONLY")
+        server = dbapi_connection.get_server_info() if hasattr(dbapi_connection, "get_server_info") else ""
+        # В MySQL MAX_EXECUTION_TIME ограничивает время SELECT в миллисекундах,
+        # в MariaDB такой переменной нет, там max_statement_time в секундах
+        if "mariadb" in server.lower():
+            timeout_sql = f"SET SESSION max_statement_time = {SQL_TIMEOUT}"
+        else:
+            timeout_sql = f"SET SESSION MAX_EXECUTION_TIME = {int(SQL_TIMEOUT * 1000)}"
+        try:
+            cursor.execute(timeout_sql)
+        except Exception as error:
+            # Без ограничения времени соединение все равно только для чтения
+            logging.warning("Не удалось ограничить время запроса (%s): %s", server, error)
+    cursor.close()
 
 
 class Base(DeclarativeBase):
@@ -0,0 +1,153 @@
+from sqlalchemy import Connection, inspect, select, update, insert, delete, func, bindparam, text
+
+from DataBase.attributes import characteristic_tokens
+from DataBase.models import (
+    GoodsTableORM,
+    GoodsAttributeORM,
+    GoodsStatsORM,
+    PostsTableORM,
+    SchemaVersionORM,
+    utc_now
+)
+
+# Количество строк, обновляемых за один запрос при заполнении новых колонок
+BATCH_SIZE = 1000
+
+
+def add_goods_brand(conn: Connection):
+    """
+    Выносит бренд из названия товара в отдельную колонку brand.
+
+    Раньше бренд хранился только в name ("Apple iPhone 15"),
+    поэтому берем первое слово названия. После заполнения
+    создаем составной индекс (category_id, brand, price).
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("goods")}
+    if "brand" not in columns:
+        conn.execute(text("ALTER TABLE goods ADD COLUMN brand VARCHAR(50) NOT NULL DEFAULT ''"))
+
+    last_id = 0
+    stmt = update(GoodsTableORM).where(GoodsTableORM.id == bindparam("goods_id")).values(brand=bindparam("new_brand"))
+    while True:
+        rows = conn.execute(
+            select(GoodsTableORM.id, GoodsTableORM.name)
+            .where(GoodsTableORM.id > last_id, GoodsTableORM.brand == "")
+            .order_by(GoodsTableORM.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        conn.execute(stmt, [{"goods_id": id, "new_brand": name.split(" ", 1)[0].lower()} for id, name in rows])
+        last_id = rows[-1].id
+
+    for index in GoodsTableORM.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def index_goods_attributes(conn: Connection):
+    """
+    Заполняет goods_attributes словами из характеристик уже добавленных товаров.
+    Сама таблица создается через create_all.
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(GoodsTableORM.id, GoodsTableORM.characteristics)
+            .where(GoodsTableORM.id > last_id)
+            .order_by(GoodsTableORM.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        conn.execute(delete(GoodsAttributeORM).where(GoodsAttributeORM.goods_id.in_([row.id for row in rows])))
+        attributes = [
+            {"goods_id": id, "token": token}
+            for id, characteristics in rows
+            for token in characteristic_tokens(characteristics)
+        ]
+        if attributes:
+            conn.execute(insert(GoodsAttributeORM), attributes)
+        last_id = rows[-1].id
+
+
+def add_posts_created_at(conn: Connection):
+    """
+    Добавляет в posts время создания строки для очистки старых строк
+    и индексы для поиска сообщения и для очистки.
+
+    Старым строкам проставляется текущее время,
+    поэтому они удалятся через POSTS_TTL после миграции.
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("posts")}
+    if "created_at" not in columns:
+        conn.execute(text("ALTER TABLE posts ADD COLUMN created_at DATETIME NULL"))
+
+    now = utc_now()
+    while True:
+        ids = conn.execute(
+            select(PostsTableORM.id).where(PostsTableORM.created_at.is_(None)).limit(BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            break
+        conn.execute(update(PostsTableORM).where(PostsTableORM.id.in_(ids)).values(created_at=now))
+
+    for index in PostsTableORM.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def fill_goods_stats(conn: Connection):
+    """
+    Заполняет goods_stats по уже добавленным товарам.
+    Дальше таблицу обновляют запросы добавления и удаления товаров.
+
+    Бренд для кнопок берется из начала названия товара,
+    так как name хранится вместе с брендом ("Apple iPhone 15").
+    """
+    conn.execute(delete(GoodsStatsORM))
+    rows = conn.execute(
+        select(
+            GoodsTableORM.category_id,
+            GoodsTableORM.brand,
+            func.min(GoodsTableORM.name),
+            func.count(GoodsTableORM.id),
+            func.min(GoodsTableORM.price),
+            func.max(GoodsTableORM.price),
+            func.sum(GoodsTableORM.price)
+        ).group_by(GoodsTableORM.category_id, GoodsTableORM.brand)
+    ).all()
+
+    if rows:
+        conn.execute(insert(GoodsStatsORM), [
+            {
+                "category_id": category_id,
+                "brand": brand,
+                "title": name[:len(brand)] or brand,
+                "count": count,
+                "min_price": min_price,
+                "max_price": max_price,
+                "sum_price": sum_price
+            }
+            for category_id, brand, name, count, min_price, max_price, sum_price in rows
+        ])
+
+
+# Миграции применяются по порядку, номер миграции - ее позиция в списке
+MIGRATIONS = [
+    add_goods_brand,
+    index_goods_attributes,
+    add_posts_created_at,
+    fill_goods_stats,
+]
+
+
+def run_migrations(conn: Connection):
+    # Применяем миграции, которые еще не записаны в schema_version
+    current = conn.execute(select(func.max(SchemaVersionORM.version))).scalar() or 0
+
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        migration(conn)
+        conn.execute(insert(SchemaVersionORM).values(version=version))
@@ -1,24 +1,89 @@
-from sqlalchemy import String
+from sqlalchemy import String, Index, ForeignKey, BigInteger
 from sqlalchemy.orm import mapped_column, Mapped
 
 from DataBase.database import Base
 
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    # Время в UTC без часового пояса, одинаково для MySQL и sqlite
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class GoodsTableORM(Base):
     __tablename__ = "goods"
+    __table_args__ = (
+        # Покрывает фильтры по категории, бренду и ценовой категории
+        Index("ix_goods_category_brand_price", "category_id", "brand", "price"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     category_id: Mapped[str] = mapped_column(String(length=20))
+    # Бренд в нижнем регистре, в name он остается для отображения
+    brand: Mapped[str] = mapped_column(String(length=50), server_default="")
     name: Mapped[str] = mapped_column(String(length=100))
     price: Mapped[int]
     characteristics: Mapped[str] = mapped_column(String(length=300))
     photo: Mapped[str] = mapped_column(String(length=100))
 
 
+class GoodsAttributeORM(Base):
+    # Слова из характеристик товара для поиска без LIKE '%...%'
+    __tablename__ = "goods_attributes"
+    __table_args__ = (
+        Index("ix_goods_attributes_token", "token", "goods_id"),
+    )
+
+    goods_id: Mapped[int] = mapped_column(ForeignKey("goods.id", ondelete="CASCADE"), primary_key=True)
+    token: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+
+
+class GoodsStatsORM(Base):
+    """
+    Количество и цены товаров по категории и бренду.
+
+    Обновляется в той же транзакции, что и goods,
+    при добавлении и удалении товаров, без пересчета по всей таблице.
+    """
+    __tablename__ = "goods_stats"
+
+    category_id: Mapped[str] = mapped_column(String(length=20), primary_key=True)
+    brand: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+    # Бренд для кнопок в том виде, в котором его ввел админ
+    title: Mapped[str] = mapped_column(String(length=50))
+    count: Mapped[int]
+    min_price: Mapped[int]
+    max_price: Mapped[int]
+    sum_price: Mapped[int] = mapped_column(BigInteger)
+
+
 class PostsTableORM(Base):
+    # Сообщения с товарами в режиме удаления, старые строки удаляет posts_purger
     __tablename__ = "posts"
+    __table_args__ = (
+        # Поиск сообщения в select_posts_msg
+        Index("ix_posts_post_goods", "post_id", "goods_id"),
+        Index("ix_posts_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     post_id: Mapped[int]
-    message_id: Mapped[int] = mapped_column(primary_key=True)
-    goods_id: Mapped[int] = mapped_column(primary_key=True)
+    message_id: Mapped[int]
+    goods_id: Mapped[int]
+    created_at: Mapped[datetime] = mapped_column(default=utc_now)
+
+
+class MediaTableORM(Base):
+    # file_id статичных картинок бота, загруженных в Telegram
+    __tablename__ = "media"
+
+    key: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String(length=200))
+
+
+class SchemaVersionORM(Base):
+    # Номера примененных миграций из DataBase/migrations.py
+    __tablename__ = "schema_version"
+
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from functools import wraps
+from inspect import signature
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+import asyncio
+import os
+import time
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые вызовы.
+
+    Пока выполняется вызов с ключом key, остальные вызовы с тем же
+    ключом не запускают работу заново, а ждут его результат
+    (или его исключение). Работа идет отдельной задачей, поэтому
+    отмена одного из ожидающих не отменяет ее для остальных.
+    """
+
+    def __init__(self):
+        self._flights: dict = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    async def run(self, key: Hashable, func: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        self.calls += 1
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Исключение забирается, даже если все ожидающие были отменены
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, predicate: Callable[[Hashable], bool]):
+        # Новые вызовы с такими ключами не присоединятся к уже идущим
+        for key in [key for key in self._flights if predicate(key)]:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "collapse_rate": self.collapsed / self.calls if self.calls else 0.0
+        }
+
+
+class QueryCache:
+    """
+    LRU кэш результатов запросов каталога с ограничением по времени жизни.
+
+    Ключ записи - (имя запроса, категория, бренд, остальные фильтры),
+    поэтому при изменении товара можно удалить только записи,
+    которые зависят от его категории и бренда.
+    Одновременные промахи с одним ключом выполняют один запрос (flights).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.flights = SingleFlight()
+        # Меняется при каждом сбросе, чтобы не сохранить результат, полученный до изменения товаров
+        self.generation = 0
+
+    def get(self, key: tuple) -> Tuple[bool, Any]:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return True, item[1]
+
+    def set(self, key: tuple, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, category: str, brand: str):
+        """
+        Удаляет записи, на которые влияет товар из category и brand.
+
+        Запрос без фильтра (None) тоже зависит от этого товара,
+        например средняя цена по всей категории.
+        """
+        brand = brand.lower()
+
+        def affected(key: tuple) -> bool:
+            return key[1] in (category, None) and key[2] in (brand, None)
+
+        stale = [key for key in self._data if affected(key)]
+        for key in stale:
+            del self._data[key]
+        self.invalidated += len(stale)
+        self.flights.forget(affected)
+        self.generation += 1
+
+    def clear(self):
+        self.invalidated += len(self._data)
+        self._data.clear()
+        self.flights.forget(lambda key: True)
+        self.generation += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidated": self.invalidated,
+            "collapsed": self.flights.collapsed
+        }
+
+    def cached(self, func):
+        """
+        Декоратор для запросов с параметрами category и brand.
+        Остальные параметры функции тоже входят в ключ.
+        При промахе одновременные вызовы с одним ключом ждут один запрос к базе.
+        """
+        func_signature = signature(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = func_signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            category: Optional[str] = params.pop("category")
+            brand: Optional[str] = params.pop("brand")
+            key = (func.__name__, category, brand.lower() if brand is not None else None, *sorted(params.items()))
+
+            found, value = self.get(key)
+            if found:
+                return value
+
+            async def load():
+                generation = self.generation
+                value = await func(*args, **kwargs)
+                # Пока шел запрос, товары могли измениться
+                if generation == self.generation:
+                    self.set(key, value)
+                return value
+
+            return await self.flights.run(key, load)
+
+        return wrapper
+
+
+goods_cache = QueryCache(
+    maxsize=int(os.getenv("CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("CACHE_TTL", 300))
+)
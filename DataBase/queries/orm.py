@@ -1,84 +1,295 @@
-from sqlalchemy import select, and_, delete, func
+from sqlalchemy import select, delete, insert, func, cast, Float
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from DataBase.attributes import characteristic_tokens
 from DataBase.database import engine, Base, factory_session
-from DataBase.models import GoodsTableORM, PostsTableORM
-from typing import List
+from DataBase.queries.cache import goods_cache
+from DataBase.migrations import run_migrations
+from DataBase.models import GoodsTableORM, GoodsAttributeORM, GoodsStatsORM, PostsTableORM, MediaTableORM
+from datetime import datetime
+from typing import List, Optional
 
 
 async def create_table():
-    # Создаем все таблицы наследованные из класса Base
-    Base.metadata.create_all(engine)
+    # Создаем все таблицы наследованные из класса Base и применяем миграции
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
 
 
-async def insert_goods(category_id: str, brand: str, name: str, price: int, characteristics: str, photo: str):
-    # Добавляем товар в таблицу
-    with factory_session() as session:
-        with session.begin():
+def group_goods_stats(goods_rows: list) -> dict:
+    """
+    Сводка по (категория, бренд) для изменения goods_stats
+
+    :param goods_rows: кортежи (категория, бренд в нижнем регистре, бренд для кнопок, цена)
+    """
+    groups = {}
+    for category_id, brand, title, price in goods_rows:
+        group = groups.setdefault((category_id, brand), {
+            "title": title, "count": 0, "min_price": price, "max_price": price, "sum_price": 0
+        })
+        group["count"] += 1
+        group["sum_price"] += price
+        group["min_price"] = min(group["min_price"], price)
+        group["max_price"] = max(group["max_price"], price)
+    return groups
+
+
+async def add_goods_stats(session: AsyncSession, goods_rows: list):
+    # Прибавляет товары к goods_stats одним INSERT ... ON DUPLICATE KEY / ON CONFLICT,
+    # у существующей строки title остается прежним
+    values = [
+        {"category_id": category_id, "brand": brand, **group}
+        for (category_id, brand), group in group_goods_stats(goods_rows).items()
+    ]
+    if not values:
+        return
+
+    if engine.dialect.name == "mysql":
+        stmt = mysql_insert(GoodsStatsORM).values(values)
+        new = stmt.inserted
+        stmt = stmt.on_duplicate_key_update(
+            count=GoodsStatsORM.count + new.count,
+            sum_price=GoodsStatsORM.sum_price + new.sum_price,
+            min_price=func.least(GoodsStatsORM.min_price, new.min_price),
+            max_price=func.greatest(GoodsStatsORM.max_price, new.max_price)
+        )
+    else:
+        stmt = sqlite_insert(GoodsStatsORM).values(values)
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GoodsStatsORM.category_id, GoodsStatsORM.brand],
+            set_={
+                "count": GoodsStatsORM.count + new.count,
+                "sum_price": GoodsStatsORM.sum_price + new.sum_price,
+                "min_price": func.min(GoodsStatsORM.min_price, new.min_price),
+                "max_price": func.max(GoodsStatsORM.max_price, new.max_price)
+            }
+        )
+    await session.execute(stmt)
+
+
+async def remove_goods_stats(session: AsyncSession, goods_rows: list):
+    """
+    Вычитает удаленные товары из goods_stats
+
+    Вызывается после удаления из goods в той же транзакции.
+    Минимум и максимум пересчитываются по индексу
+    (category_id, brand, price), только если удалена крайняя цена.
+    """
+    for (category_id, brand), group in group_goods_stats(goods_rows).items():
+        stats = await session.get(GoodsStatsORM, (category_id, brand), with_for_update=True)
+        if stats is None:
+            continue
+
+        stats.count -= group["count"]
+        stats.sum_price -= group["sum_price"]
+        if stats.count <= 0:
+            await session.delete(stats)
+        elif group["min_price"] <= stats.min_price or group["max_price"] >= stats.max_price:
+            stats.min_price, stats.max_price = (await session.execute(
+                select(func.min(GoodsTableORM.price), func.max(GoodsTableORM.price))
+                .where(*goods_filters(brand=brand, category=category_id))
+            )).one()
+    await session.flush()
+
+
+async def insert_goods(category_id: str, brand: str, name: str, price: int, characteristics: str, photo: str) -> int:
+    # Добавляем товар в таблицу и возвращаем его ID
+    async with factory_session() as session:
+        async with session.begin():
             stmt = GoodsTableORM(
                 category_id=category_id,
+                brand=brand.lower(),
                 name=f"{brand} {name}",
                 price=price,
                 characteristics=characteristics,
                 photo=photo
             )
             session.add(stmt)
+            await session.flush()
 
+            # Слова характеристик для фильтра select_goods(characteristic=...)
+            session.add_all(
+                GoodsAttributeORM(goods_id=stmt.id, token=token)
+                for token in characteristic_tokens(characteristics)
+            )
+            await add_goods_stats(session, [(category_id, brand.lower(), brand, price)])
 
-async def select_avg_price(brand="_", category="_"):
-    # Вычисляем среднее арифметическое цен товара.
-    with factory_session() as session:
-        stmt = select(func.avg(GoodsTableORM.price)).where(
-            GoodsTableORM.name.like(f"{brand}%"),
-            GoodsTableORM.category_id.like(f"{category}%"))
+    goods_cache.invalidate(category_id, brand)
+    return stmt.id
+
+
+async def insert_goods_many(goods_list: List[dict]) -> List[int]:
+    """
+    Добавляет пачку товаров одной транзакцией и возвращает их ID
+
+    :param goods_list: словари с полями insert_goods
+
+    Товары вставляются одним flush (несколько строк в INSERT,
+    где драйвер это поддерживает), слова характеристик
+    и goods_stats - одним запросом на всю пачку.
+    """
+    async with factory_session() as session:
+        async with session.begin():
+            goods_rows = [
+                GoodsTableORM(
+                    category_id=goods["category_id"],
+                    brand=goods["brand"].lower(),
+                    name=f"{goods['brand']} {goods['name']}",
+                    price=goods["price"],
+                    characteristics=goods["characteristics"],
+                    photo=goods["photo"]
+                )
+                for goods in goods_list
+            ]
+            session.add_all(goods_rows)
+            await session.flush()
+
+            attributes = [
+                {"goods_id": goods.id, "token": token}
+                for goods in goods_rows
+                for token in characteristic_tokens(goods.characteristics)
+            ]
+            if attributes:
+                await session.execute(insert(GoodsAttributeORM), attributes)
+            await add_goods_stats(session, [
+                (goods["category_id"], goods["brand"].lower(), goods["brand"], goods["price"]) for goods in goods_list
+            ])
+
+    for category_id, brand in {(goods["category_id"], goods["brand"].lower()) for goods in goods_list}:
+        goods_cache.invalidate(category_id, brand)
+    return [goods.id for goods in goods_rows]
+
+
+def goods_filters(brand: Optional[str] = None, category: Optional[str] = None) -> list:
+    # Условия по бренду и категории, None означает любое значение
+    filters = []
+    if brand is not None:
+        filters.append(GoodsTableORM.brand == brand.lower())
+    if category is not None:
+        filters.append(GoodsTableORM.category_id == category)
+    return filters
+
+
+def filter_characteristic(stmt, characteristic: str):
+    """
+    Оставляет товары, у которых есть все слова из characteristic.
 
-        price = session.execute(stmt)
+    Каждое слово - соединение с goods_attributes по (goods_id, token),
+    поэтому база сама выбирает: идти от индекса слова или от индекса категории.
+    """
+    for token in sorted(characteristic_tokens(characteristic)):
+        attribute = aliased(GoodsAttributeORM)
+        stmt = stmt.join(attribute, (attribute.goods_id == GoodsTableORM.id) & (attribute.token == token))
+    return stmt
+
+
+def stats_filters(brand: Optional[str] = None, category: Optional[str] = None) -> list:
+    # Условия goods_filters для таблицы goods_stats
+    filters = []
+    if brand is not None:
+        filters.append(GoodsStatsORM.brand == brand.lower())
+    if category is not None:
+        filters.append(GoodsStatsORM.category_id == category)
+    return filters
+
+
+def avg_price_stmt(brand: Optional[str] = None, category: Optional[str] = None):
+    """
+    Запрос среднего арифметического цен товара, 0 если товаров нет
+
+    Считается по goods_stats: сумма цен и количество
+    по нескольким строкам (категория, бренд) вместо AVG по товарам.
+    """
+    return select(func.coalesce(
+        cast(func.sum(GoodsStatsORM.sum_price), Float) / func.nullif(func.sum(GoodsStatsORM.count), 0), 0
+    )).where(*stats_filters(brand=brand, category=category))
+
+
+@goods_cache.cached
+async def select_avg_price(brand: Optional[str] = None, category: Optional[str] = None):
+    # Вычисляем среднее арифметическое цен товара.
+    async with factory_session() as session:
+        price = await session.execute(avg_price_stmt(brand=brand, category=category))
         return price.scalar() or 0
 
 
-async def select_goods(brand="_", category="_", characteristic="_", price="all", action=1) -> List[tuple] | tuple:
+@goods_cache.cached
+async def select_goods_stats(brand: Optional[str] = None, category: Optional[str] = None) -> List[GoodsStatsORM]:
+    """
+    Строки goods_stats по фильтрам, бренды с большим числом товаров первыми
+
+    Для кнопок брендов с количеством товаров, в таблице
+    есть только бренды, у которых есть товары.
+    """
+    async with factory_session() as session:
+        stats = await session.execute(
+            select(GoodsStatsORM)
+            .where(*stats_filters(brand=brand, category=category))
+            .order_by(GoodsStatsORM.count.desc(), GoodsStatsORM.brand)
+        )
+        return list(stats.scalars())
+
+
+def filtered_goods_stmt(stmt, brand=None, category=None, characteristic=None, price="all", after_id=0):
+    # Добавляет к запросу stmt фильтры каталога
+    stmt = stmt.where(*goods_filters(brand=brand, category=category))
+
+    if characteristic is not None:
+        stmt = filter_characteristic(stmt, characteristic)
+
+    if price == "expensive":
+        stmt = stmt.where(GoodsTableORM.price >= avg_price_stmt(brand=brand, category=category).scalar_subquery())
+    elif price == "budget":
+        stmt = stmt.where(GoodsTableORM.price <= avg_price_stmt(brand=brand, category=category).scalar_subquery())
+
+    if after_id:
+        stmt = stmt.where(GoodsTableORM.id > after_id)
+
+    return stmt
+
+
+@goods_cache.cached
+async def select_goods(
+        brand: Optional[str] = None,
+        category: Optional[str] = None,
+        characteristic: Optional[str] = None,
+        price="all",
+        action=1,
+        after_id: int = 0,
+        limit: Optional[int] = None
+) -> List[tuple] | tuple:
     """
     Запрос из базы данных, нужных товаров по фильтрам
 
-    :param brand:
-    :param category:
-    :param characteristic:
+    :param brand: Бренд без учета регистра, None - любой
+    :param category: Категория, None - любая
+    :param characteristic: Слово из характеристик (например type-c), None - любые
     :param price: Если all, то все.
                   Если expensive, то больше средней цены.
                   Если budget, то ниже средней цены
     :param action: Если 1, то все данные. А если 0, то только первый.
+    :param after_id: Курсор страницы, товары с ID больше него
+    :param limit: Размер страницы, None - без ограничения
+
+    Средняя цена вычисляется подзапросом в том же запросе,
+    поэтому на любой фильтр уходит одно обращение к базе.
+    Результат кэшируется в goods_cache до изменения товаров
+    этой категории и бренда.
     """
-    avg_price = await select_avg_price(brand=brand, category=category)
+    stmt = filtered_goods_stmt(
+        select(GoodsTableORM),
+        brand=brand, category=category, characteristic=characteristic, price=price, after_id=after_id
+    ).order_by(GoodsTableORM.id)
 
-    if price == "expensive":
-        stmt = select(GoodsTableORM).where(
-            and_(
-                GoodsTableORM.name.like(f"{brand}%"),
-                GoodsTableORM.category_id.like(f"{category}%"),
-                GoodsTableORM.characteristics.like(f"%{characteristic}%"),
-                GoodsTableORM.price >= avg_price
-            )
+    if limit is not None:
+        stmt = stmt.limit(limit)
 
-        )
-    elif price == "budget":
-        stmt = select(GoodsTableORM).where(
-            and_(
-                GoodsTableORM.name.like(f"{brand}%"),
-                GoodsTableORM.category_id.like(f"{category}%"),
-                GoodsTableORM.characteristics.like(f"%{characteristic}%"),
-                GoodsTableORM.price <= avg_price
-            )
-        )
-    else:
-        stmt = select(GoodsTableORM).where(
-            and_(
-                GoodsTableORM.name.like(f"{brand}%"),
-                GoodsTableORM.category_id.like(f"{category}%"),
-                GoodsTableORM.characteristics.like(f"%{characteristic}%")
-            )
-        )
-
-    with factory_session() as session:
-        goods = session.execute(stmt)
-        session.commit()
+    async with factory_session() as session:
+        goods = await session.execute(stmt)
 
         if action:
             return goods.all()
@@ -86,18 +297,80 @@ async def select_goods(brand="_", category="_", characteristic="_", price="all",
             return goods.first()
 
 
+@goods_cache.cached
+async def count_goods(
+        brand: Optional[str] = None,
+        category: Optional[str] = None,
+        characteristic: Optional[str] = None,
+        price="all",
+        after_id: int = 0
+) -> int:
+    # Количество товаров по тем же фильтрам, что и в select_goods
+    stmt = filtered_goods_stmt(
+        select(func.count(GoodsTableORM.id)),
+        brand=brand, category=category, characteristic=characteristic, price=price, after_id=after_id
+    )
+
+    async with factory_session() as session:
+        count = await session.execute(stmt)
+        return count.scalar()
+
+
+async def select_goods_by_id(id: int) -> Optional[GoodsTableORM]:
+    # Получаем товар по его ID
+    async with factory_session() as session:
+        return await session.get(GoodsTableORM, id)
+
+
 async def delete_goods_orm(id: int):
     # Удаляем товар из таблицы с помощью ID товара
-    with factory_session() as session:
-        with session.begin():
+    async with factory_session() as session:
+        async with session.begin():
+            # Категория, бренд и цена нужны для goods_stats и чтобы сбросить кэш только для них
+            goods = (await session.execute(
+                select(GoodsTableORM.category_id, GoodsTableORM.brand, GoodsTableORM.price).where(GoodsTableORM.id == id)
+            )).first()
+            # Внешний ключ каскадный, но sqlite без PRAGMA foreign_keys его не учитывает
+            await session.execute(delete(GoodsAttributeORM).where(GoodsAttributeORM.goods_id == id))
             stmt = delete(GoodsTableORM).where(GoodsTableORM.id == id)
 
-            session.execute(stmt)
+            await session.execute(stmt)
+            if goods:
+                await remove_goods_stats(session, [(goods.category_id, goods.brand, goods.brand, goods.price)])
+
+    if goods:
+        goods_cache.invalidate(goods.category_id, goods.brand)
+
+
+async def delete_goods_many(ids: List[int]) -> int:
+    """
+    Удаляет товары по списку ID одним DELETE ... WHERE id IN (...)
+
+    :return: количество удаленных товаров
+    """
+    async with factory_session() as session:
+        async with session.begin():
+            # Категории, бренды и цены нужны для goods_stats и чтобы сбросить кэш только для них
+            goods_rows = [
+                (category_id, brand, brand, price)
+                for category_id, brand, price in await session.execute(
+                    select(GoodsTableORM.category_id, GoodsTableORM.brand, GoodsTableORM.price)
+                    .where(GoodsTableORM.id.in_(ids))
+                )
+            ]
+            # Внешний ключ каскадный, но sqlite без PRAGMA foreign_keys его не учитывает
+            await session.execute(delete(GoodsAttributeORM).where(GoodsAttributeORM.goods_id.in_(ids)))
+            deleted = await session.execute(delete(GoodsTableORM).where(GoodsTableORM.id.in_(ids)))
+            await remove_goods_stats(session, goods_rows)
+
+    for category_id, brand in {(category_id, brand) for category_id, brand, _, _ in goods_rows}:
+        goods_cache.invalidate(category_id, brand)
+    return deleted.rowcount
 
 
 async def insert_posts(posts_id: int, message_ids: list, goods_ids: list):
     # Добавляем группу сообщений для дальнейшего использования
-    with factory_session() as session:
+    async with factory_session() as session:
         for message_id, goods_id in zip(message_ids, goods_ids):
             stmt = PostsTableORM(
                 post_id=posts_id,
@@ -106,7 +379,7 @@ async def insert_posts(posts_id: int, message_ids: list, goods_ids: list):
             )
             session.add(stmt)
 
-        session.commit()
+        await session.commit()
 
 
 async def select_posts_msg(post_id: int, goods_id: int):
@@ -119,23 +392,53 @@ async def select_posts_msg(post_id: int, goods_id: int):
     Когда мы отправляем список товаров, для удаления
     то мы сохраняем в базе данных.
     """
-    with factory_session() as session:
+    async with factory_session() as session:
         stmt = select(PostsTableORM.message_id).where(
             PostsTableORM.post_id == post_id,
             PostsTableORM.goods_id == goods_id
         )
-        post = session.execute(stmt)
+        post = await session.execute(stmt)
         message_id = post.scalar()
         return message_id
 
 
+async def purge_posts(before: datetime, batch_size: int) -> int:
+    """
+    Удаляет одну пачку строк posts, созданных раньше before
 
+    :return: количество удаленных строк, меньше batch_size - старых строк больше нет
 
-
-
-
-
-
-
-
-
+    Сначала выбираются ID по индексу created_at, затем удаляются
+    по первичному ключу, чтобы одна транзакция не держала
+    блокировки на всю таблицу.
+    """
+    async with factory_session() as session:
+        async with session.begin():
+            ids = (await session.execute(
+                select(PostsTableORM.id)
+                .where(PostsTableORM.created_at < before)
+                .order_by(PostsTableORM.created_at)
+                .limit(batch_size)
+            )).scalars().all()
+            if ids:
+                await session.execute(delete(PostsTableORM).where(PostsTableORM.id.in_(ids)))
+    return len(ids)
+
+
+async def count_posts() -> int:
+    async with factory_session() as session:
+        return (await session.execute(select(func.count()).select_from(PostsTableORM))).scalar()
+
+
+async def select_media() -> dict:
+    # Получаем все сохраненные file_id картинок по их ключам
+    async with factory_session() as session:
+        media = await session.execute(select(MediaTableORM.key, MediaTableORM.file_id))
+        return dict(media.all())
+
+
+async def save_media(key: str, file_id: str):
+    # Сохраняем или заменяем file_id картинки
+    async with factory_session() as session:
+        async with session.begin():
+            await session.merge(MediaTableORM(key=key, file_id=file_id))
@@ -0,0 +1,74 @@
+"""
+Бенчмарк запросов к ИИ внутри цикла событий и через ai_executor.
+
+Пока идут вопросы к ИИ (поддельный LLM с задержкой --llm-latency),
+измеряется задержка цикла событий - столько ждал бы ответа
+пользователь, листающий каталог. Запуск:
+
+    python benchmarks/bench_ai_executor.py --questions 8 --concurrency 4
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import common  # noqa: F401
+from fake_llm import fake_service_context
+
+from services.ai_executor import AIExecutor
+from services.index_service import IndexService
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - started - 0.005)
+
+
+async def run(ask, questions: int) -> dict:
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(ask(f"Вопрос {number}") for number in range(questions)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return {"elapsed": elapsed, "max_loop_lag": max(lags, default=0)}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    service = IndexService(
+        persist_dir=tempfile.mkdtemp(),
+        service_context=fake_service_context(args.llm_latency, embed_latency=0.05)
+    )
+    service.load()
+
+    async def blocking_ask(question: str):
+        # Старая реализация: синхронный query прямо в корутине
+        return service.query(question)
+
+    executor = AIExecutor(concurrency=args.concurrency, timeout=60)
+
+    async def executor_ask(question: str):
+        return await executor.run(service.query, question)
+
+    for title, ask in (("в цикле (до)", blocking_ask), ("ai_executor (после)", executor_ask)):
+        result = await run(ask, args.questions)
+        print(
+            f"{title:>20}: {result['elapsed']:.2f} с на {args.questions} вопросов, "
+            f"макс. задержка цикла {result['max_loop_lag'] * 1000:.0f} мс"
+        )
+
+    stats = executor.stats()
+    print(f"ожидание в очереди ai_executor: {stats['avg_wait']:.2f} с в среднем, {stats['max_wait']:.2f} с макс.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
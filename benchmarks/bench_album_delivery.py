@@ -0,0 +1,47 @@
+"""
+Бенчмарк отправки карточек товаров: альбомы против отдельных фото.
+
+Считает запросы к Bot API и время отправки страницы покупателя
+(2 товара) и списка админа (20 товаров) при задержке сети --latency.
+Запуск:
+
+    python benchmarks/bench_album_delivery.py --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import common  # noqa: F401
+from fake_telegram import fake_bot, fake_message
+
+from services import goods_album
+
+
+def goods(count: int) -> list:
+    return [
+        SimpleNamespace(id=index, name=f"Apple model {index}", price=1000, characteristics="USB Type-C", photo="photo")
+        for index in range(count)
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    bot = fake_bot(args.latency)
+    message = fake_message(bot)
+
+    for title, count in (("страница покупателя", 2), ("список админа", 20)):
+        for mode in ("photo", "album"):
+            goods_album.GOODS_DELIVERY = mode
+            bot.session.calls.clear()
+            started = time.perf_counter()
+            await goods_album.send_goods(message, goods(count))
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{title} ({count}), {mode:>5}: {sum(bot.session.calls.values()):>2} запросов, {elapsed:.0f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
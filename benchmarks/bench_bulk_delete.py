@@ -0,0 +1,107 @@
+"""
+Бенчмарк удаления товаров админом: карточка и кнопка на каждый товар
+против списка с отметками и одного "Удалить выбранные".
+
+Нажатия идут через Dispatcher с роутером админа, Telegram поддельный
+с задержкой --latency. Считаются запросы к Bot API, SQL запросы
+и время на удаление --goods товаров одной категории и бренда. Запуск:
+
+    python benchmarks/bench_bulk_delete.py --goods 100
+"""
+import os
+
+os.environ.setdefault("ADMIN_ID", "1")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import time  # noqa: E402
+from itertools import count  # noqa: E402
+
+import common  # noqa: F401, E402
+from fake_telegram import fake_bot, fake_message  # noqa: E402
+
+from aiogram import Dispatcher  # noqa: E402
+from aiogram.types import CallbackQuery, Update, User  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from DataBase.database import engine  # noqa: E402
+from DataBase.queries.orm import create_table, insert_goods_many, count_goods  # noqa: E402
+from handlers import admin  # noqa: E402
+from keyboards.admin_keyboard import BulkDeleteCallback, DeleteGoodsCallback  # noqa: E402
+
+CATEGORY, BRAND = "phone", "Apple"
+update_ids = count(1)
+
+
+async def click(dp: Dispatcher, bot, data: str, message_id: int = 500):
+    callback = CallbackQuery(
+        id=str(next(update_ids)),
+        from_user=User(id=1, is_bot=False, first_name="admin"),
+        chat_instance="1",
+        message=fake_message(None, message_id=message_id),
+        data=data
+    )
+    await dp.feed_update(bot, Update(update_id=next(update_ids), callback_query=callback))
+
+
+async def seed(goods: int) -> list:
+    return await insert_goods_many([
+        {
+            "category_id": CATEGORY, "brand": BRAND, "name": f"model {index}",
+            "price": 1000 + index, "characteristics": "USB Type-C", "photo": "photo"
+        }
+        for index in range(goods)
+    ])
+
+
+async def choose_brand(dp: Dispatcher, bot):
+    # Состояние после выбора категории и бренда в меню админа
+    state = dp.fsm.get_context(bot, chat_id=1, user_id=1)
+    await state.set_data({"choose_category": CATEGORY, "choose_brand": BRAND})
+
+
+async def old_delete(dp: Dispatcher, bot, ids: list):
+    await choose_brand(dp, bot)
+    await click(dp, bot, "delete_goods")
+    for goods_id in ids:
+        await click(dp, bot, DeleteGoodsCallback(post_id=500, goods_id=goods_id).pack())
+
+
+async def bulk_delete(dp: Dispatcher, bot, ids: list):
+    await choose_brand(dp, bot)
+    await click(dp, bot, "bulk_delete_goods")
+    await click(dp, bot, BulkDeleteCallback(action="all").pack())
+    await click(dp, bot, BulkDeleteCallback(action="delete").pack())
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--goods", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    await create_table()
+    dp = Dispatcher()
+    dp.include_router(admin.router)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *_: statements.append(1))
+
+    for title, delete in (("по одному (до)", old_delete), ("отметки (после)", bulk_delete)):
+        ids = await seed(args.goods)
+        bot = fake_bot(args.latency)
+        statements.clear()
+        started = time.perf_counter()
+        await delete(dp, bot, ids)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{title:>16}: {sum(bot.session.calls.values()):>4} запросов к Bot API, "
+            f"{len(statements):>4} SQL, {elapsed:.2f} с, "
+            f"осталось товаров: {await count_goods(category=CATEGORY, brand=BRAND)}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Бенчмарк маршрутизации callback_query: обычная проверка фильтров
+всех хэндлеров по порядку против CallbackIndex по префиксу колбэка.
+
+Роутеры бота копируются с теми же фильтрами в том же порядке,
+а вместо хэндлеров стоят заглушки, которые запоминают, какой хэндлер
+был выбран, поэтому замеряется только выбор хэндлера (вместе с
+Dispatcher.feed_update). Обе схемы должны выбрать одни и те же
+хэндлеры. Запуск:
+
+    python benchmarks/bench_callback_dispatch.py --updates 20000
+"""
+import os
+
+os.environ.setdefault("ADMIN_ID", "1")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+from itertools import count  # noqa: E402
+
+import common  # noqa: F401, E402
+from fake_telegram import fake_bot, callback_update  # noqa: E402
+
+from aiogram import Dispatcher, Router  # noqa: E402
+
+from handlers import admin, assistant_handler, handlers, goods_handler  # noqa: E402
+from handlers.admin import BulkDelete  # noqa: E402
+from handlers.goods_handler import GoodsData  # noqa: E402
+from services.callback_dispatch import install_callback_index  # noqa: E402
+
+ROUTERS = [admin.router, assistant_handler.router, handlers.router, goods_handler.router]
+
+# (колбэк, состояние пользователя) - кнопки из всех меню бота
+CALLBACKS = [
+    ("catalog:phone_gadgets", None),
+    ("category:phone", None),
+    ("brand:apple:phone", None),
+    ("usb:type-c", None),
+    ("show_phone", None),
+    ("next", None),
+    ("budget", GoodsData.price),
+    ("ai_helper", None),
+    ("question:question", None),
+    ("stop_ai", None),
+    ("edit_catalog:computer", None),
+    ("edit_category:laptop", None),
+    ("delete:500:12", None),
+    ("bulk_delete:toggle:12:0", BulkDelete.select),
+    ("add_goods", None),
+]
+
+
+def clone(router: Router, chosen: list) -> Router:
+    # Копия роутера с теми же фильтрами callback_query и заглушками вместо хэндлеров
+    copy = Router(name=f"{router.name}-copy")
+    for handler in router.callback_query.handlers:
+        name = handler.callback.__name__
+
+        async def stub(callback, name=name):
+            chosen.append(name)
+
+        filters = [filter_object.magic or filter_object.callback for filter_object in handler.filters or []]
+        copy.callback_query.register(stub, *filters)
+    return copy
+
+
+def create_dispatcher(chosen: list, indexed: bool) -> Dispatcher:
+    dp = Dispatcher()
+    for router in ROUTERS:
+        dp.include_router(clone(router, chosen))
+    if indexed:
+        stats = install_callback_index(dp).stats()
+        print(f"префиксов: {stats['prefixes']}, хэндлеров без префикса: {stats['fallback']}")
+    return dp
+
+
+async def run(dp: Dispatcher, bot, updates: int) -> list:
+    update_ids = count(1)
+    # У каждого колбэка свой пользователь, чтобы задать ему состояние
+    for user_id, (_, user_state) in enumerate(CALLBACKS, start=1):
+        await dp.fsm.get_context(bot, chat_id=user_id, user_id=user_id).set_state(user_state)
+
+    timings = []
+    for index in range(updates):
+        user_id = index % len(CALLBACKS) + 1
+        update = callback_update(next(update_ids), CALLBACKS[user_id - 1][0], chat_id=user_id)
+        started = time.perf_counter()
+        await dp.feed_update(bot, update)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=20000)
+    args = parser.parse_args()
+
+    bot = fake_bot(0)
+    results = {}
+    for title, indexed in (("фильтры по порядку (до)", False), ("CallbackIndex (после)", True)):
+        chosen = []
+        timings = await run(create_dispatcher(chosen, indexed), bot, args.updates)
+        results[title] = chosen
+        print(
+            f"{title:>24}: среднее {statistics.mean(timings):.1f} мкс, "
+            f"медиана {statistics.median(timings):.1f} мкс на колбэк"
+        )
+
+    before, after = results.values()
+    assert before == after, "схемы выбрали разные хэндлеры"
+    for (data, _), name in zip(CALLBACKS, before):
+        print(f"{data:>26} -> {name}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Бенчмарк фильтра по характеристикам: LIKE '%...%' против таблицы goods_attributes.
+
+Каталог постепенно растет, на каждом размере замеряется выборка
+первой страницы зарядок с частым разъемом (type-c) и с редкой
+характеристикой (qi, примерно 0.2% товаров). Запуск:
+
+    python benchmarks/bench_characteristics.py --sizes 20000,100000,400000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import BRANDS, seed
+
+from sqlalchemy import select, update, text
+
+from DataBase.database import engine, sync_engine
+from DataBase.migrations import index_goods_attributes
+from DataBase.models import GoodsTableORM
+from DataBase.queries.orm import create_table, goods_filters, filter_characteristic
+
+
+def like_stmt(brand: str, characteristic: str):
+    return select(GoodsTableORM.id).where(
+        *goods_filters(brand=brand, category="charger"),
+        GoodsTableORM.characteristics.like(f"%{characteristic}%")
+    ).limit(10)
+
+
+def token_stmt(brand: str, characteristic: str):
+    stmt = select(GoodsTableORM.id).where(*goods_filters(brand=brand, category="charger"))
+    return filter_characteristic(stmt, characteristic).limit(10)
+
+
+def add_rare_goods(first_id: int):
+    # Каждый 500-й новый товар получает редкую характеристику
+    with sync_engine.begin() as conn:
+        conn.execute(
+            update(GoodsTableORM)
+            .where(GoodsTableORM.id >= first_id, GoodsTableORM.id % 500 == 0)
+            .values(characteristics="Wireless Qi, 15 W")
+        )
+        index_goods_attributes(conn)
+        conn.execute(text("ANALYZE"))
+
+
+def measure(build_stmt, characteristic: str, repeat: int) -> float:
+    timings = []
+    with sync_engine.connect() as conn:
+        for index in range(repeat):
+            stmt = build_stmt(BRANDS[index % len(BRANDS)], characteristic)
+            started = time.perf_counter()
+            conn.execute(stmt).all()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="20000,100000,400000")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    await create_table()
+    rows = 0
+    for size in map(int, args.sizes.split(",")):
+        seed(size - rows)
+        add_rare_goods(rows + 1)
+        rows = size
+
+        for characteristic in ("type-c", "qi"):
+            print(
+                f"{size:>8} товаров, {characteristic:>6}: LIKE {measure(like_stmt, characteristic, args.repeat):7.2f} мс, "
+                f"goods_attributes {measure(token_stmt, characteristic, args.repeat):6.2f} мс"
+            )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Бенчмарк кэша запросов каталога goods_cache.
+
+Покупатели выбирают одни и те же фильтры (категория x бренд x цена),
+а админ время от времени добавляет товар, что сбрасывает часть кэша.
+Запуск:
+
+    python benchmarks/bench_goods_cache.py --rows 50000 --requests 2000
+"""
+import os
+
+os.environ["CACHE_SIZE"] = "1024"
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import random  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+
+from common import CATEGORIES, BRANDS, seed, random_filter  # noqa: E402
+
+from DataBase.database import engine  # noqa: E402
+from DataBase.queries.cache import goods_cache  # noqa: E402
+from DataBase.queries.orm import create_table, select_goods, insert_goods  # noqa: E402
+
+
+async def run(requests: int, insert_every: int, use_cache: bool) -> list:
+    goods_cache.clear()
+    goods_cache.maxsize = 1024 if use_cache else 0
+    goods_cache.hits = goods_cache.misses = goods_cache.invalidated = 0
+    random.seed(1)
+    timings = []
+
+    for index in range(requests):
+        if index % insert_every == 0:
+            await insert_goods(random.choice(CATEGORIES), random.choice(BRANDS), "new", 1000, "USB Type-C", "photo")
+
+        started = time.perf_counter()
+        await select_goods(**random_filter())
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--insert-every", type=int, default=100)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+
+    for title, use_cache in (("без кэша", False), ("с кэшем", True)):
+        timings = await run(args.requests, args.insert_every, use_cache)
+        print(f"{title:>9}: среднее {statistics.mean(timings):.2f} мс, p95 {statistics.quantiles(timings, n=20)[-1]:.2f} мс")
+
+    print(f"Статистика кэша: {goods_cache.stats()}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Бенчмарк схемы goods с колонкой brand и индексом (category_id, brand, price).
+
+1. Заполняет таблицу, затем возвращает ее в старое состояние
+   (brand пустой, индекса нет) и замеряет миграцию с заполнением brand.
+2. Сравнивает планы и время старых запросов через LIKE по name
+   с новыми запросами по индексу. Запуск:
+
+    python benchmarks/bench_goods_index.py --rows 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import sync_session, seed, random_filter
+
+from sqlalchemy import select, update, delete, func, text
+
+from DataBase.database import engine, sync_engine
+from DataBase.migrations import run_migrations
+from DataBase.models import GoodsTableORM, SchemaVersionORM
+from DataBase.queries.orm import create_table, goods_filters, avg_price_stmt
+
+
+def legacy_filters(brand: str, category: str) -> list:
+    # Фильтры до миграции: бренд внутри name
+    return [GoodsTableORM.name.like(f"{brand}%"), GoodsTableORM.category_id.like(f"{category}%")]
+
+
+def legacy_stmt(brand: str, category: str, price: str):
+    avg_price = select(func.avg(GoodsTableORM.price)).where(*legacy_filters(brand, category)).scalar_subquery()
+    stmt = select(func.count(GoodsTableORM.id)).where(*legacy_filters(brand, category))
+    if price == "expensive":
+        stmt = stmt.where(GoodsTableORM.price >= avg_price)
+    elif price == "budget":
+        stmt = stmt.where(GoodsTableORM.price <= avg_price)
+    return stmt
+
+
+def indexed_stmt(brand: str, category: str, price: str):
+    stmt = select(func.count(GoodsTableORM.id)).where(*goods_filters(brand=brand, category=category))
+    if price == "expensive":
+        stmt = stmt.where(GoodsTableORM.price >= avg_price_stmt(brand=brand, category=category).scalar_subquery())
+    elif price == "budget":
+        stmt = stmt.where(GoodsTableORM.price <= avg_price_stmt(brand=brand, category=category).scalar_subquery())
+    return stmt
+
+
+def reset_to_legacy():
+    # Возвращаем таблицу в состояние до миграции
+    with sync_session() as session:
+        with session.begin():
+            session.execute(update(GoodsTableORM).values(brand=""))
+            session.execute(delete(SchemaVersionORM))
+            session.execute(text("DROP INDEX ix_goods_category_brand_price"))
+
+
+def explain(stmt) -> str:
+    with sync_engine.connect() as conn:
+        compiled = stmt.compile(sync_engine, compile_kwargs={"literal_binds": True})
+        plan = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "; ".join(row[-1] for row in plan)
+
+
+def measure(build_stmt, filters: list) -> list:
+    timings = []
+    with sync_engine.connect() as conn:
+        for goods_filter in filters:
+            started = time.perf_counter()
+            conn.execute(build_stmt(**goods_filter)).scalar()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+    reset_to_legacy()
+
+    started = time.perf_counter()
+    with sync_engine.begin() as conn:
+        run_migrations(conn)
+    print(f"Миграция {args.rows} строк: {time.perf_counter() - started:.1f} с")
+
+    filters = [random_filter() for _ in range(args.requests)]
+    sample = {"brand": "Apple", "category": "phone", "price": "budget"}
+    for title, build_stmt in (("LIKE (до)", legacy_stmt), ("индекс (после)", indexed_stmt)):
+        timings = measure(build_stmt, filters)
+        print(f"{title}: среднее {statistics.mean(timings):.2f} мс, макс. {max(timings):.2f} мс")
+        print(f"    план: {explain(build_stmt(**sample))}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
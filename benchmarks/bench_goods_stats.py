@@ -0,0 +1,90 @@
+"""
+Бенчмарк таблицы goods_stats.
+
+1. Ценовая категория select_goods: средняя цена подзапросом AVG по goods
+   против суммы и количества из goods_stats (результаты сравниваются).
+2. Кнопки брендов с количеством товаров: count_goods на каждый бренд
+   против одного select_goods_stats.
+
+Запуск:
+
+    python benchmarks/bench_goods_stats.py --rows 200000 --requests 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import CATEGORIES, BRANDS, seed, random_filter
+
+from sqlalchemy import select, func
+
+from DataBase.database import engine, factory_session
+from DataBase.models import GoodsTableORM
+from DataBase.queries.orm import create_table, select_goods, count_goods, select_goods_stats, goods_filters
+
+
+async def avg_select_goods(brand: str, category: str, price: str):
+    # Прежняя реализация: AVG по всем товарам категории и бренда в подзапросе
+    stmt = select(GoodsTableORM).where(*goods_filters(brand=brand, category=category))
+    avg_price = select(func.avg(GoodsTableORM.price)).where(
+        *goods_filters(brand=brand, category=category)
+    ).scalar_subquery()
+    if price == "expensive":
+        stmt = stmt.where(GoodsTableORM.price >= avg_price)
+    elif price == "budget":
+        stmt = stmt.where(GoodsTableORM.price <= avg_price)
+
+    async with factory_session() as session:
+        return (await session.execute(stmt.order_by(GoodsTableORM.id))).all()
+
+
+async def count_brands(category: str) -> dict:
+    # Без goods_stats: отдельный COUNT на каждый бренд
+    return {brand: await count_goods(brand=brand, category=category) for brand in BRANDS}
+
+
+async def stats_brands(category: str) -> dict:
+    return {row.title: row.count for row in await select_goods_stats(category=category)}
+
+
+async def measure(func_, calls: list) -> list:
+    timings = []
+    for kwargs in calls:
+        started = time.perf_counter()
+        await func_(**kwargs)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(title: str, timings: list):
+    print(f"{title:>36}: среднее {statistics.mean(timings):.2f} мс, p95 {statistics.quantiles(timings, n=20)[-1]:.2f} мс")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+
+    filters = [dict(random_filter(), price="budget") for _ in range(args.requests)]
+    for goods_filter in filters[:10]:
+        old = [goods[0].id for goods in await avg_select_goods(**goods_filter)]
+        new = [goods[0].id for goods in await select_goods(**goods_filter)]
+        assert old == new, goods_filter
+
+    report("бюджетные, AVG по goods (до)", await measure(avg_select_goods, filters))
+    report("бюджетные, goods_stats (после)", await measure(select_goods, filters))
+
+    categories = [{"category": CATEGORIES[index % len(CATEGORIES)]} for index in range(args.requests)]
+    report("кнопки брендов, COUNT (до)", await measure(count_brands, categories))
+    report("кнопки брендов, goods_stats (после)", await measure(stats_brands, categories))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Бенчмарк добавления товаров: по одному, как в пошаговом добавлении
+(insert_goods и проверочный select_goods_by_id на каждый товар),
+против импорта файла пачками (services.goods_import). Запуск:
+
+    python benchmarks/bench_import.py --rows 5000 --chunk 500
+"""
+import argparse
+import asyncio
+import csv
+import io
+import random
+import time
+
+from common import random_goods
+
+from sqlalchemy import func, select
+
+from DataBase.database import engine, factory_session
+from DataBase.models import GoodsAttributeORM
+from DataBase.queries.orm import create_table, insert_goods, select_goods_by_id
+from services.goods_import import import_goods, FIELDS
+from text import goods_translate_dict
+
+CATEGORIES = list(goods_translate_dict)
+
+
+def goods_rows(rows: int) -> list:
+    goods = []
+    for index in range(rows):
+        row = random_goods(index)
+        row["category_id"] = random.choice(CATEGORIES)
+        row["brand"] = row["name"].split()[0]
+        row["name"] = f"model {index}"
+        goods.append(row)
+    return goods
+
+
+def csv_file(goods: list) -> io.BytesIO:
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(goods)
+    # Несколько неверных строк, чтобы проверить пропуск
+    text.write("phone,Apple,bad price,abc,USB,photo\n")
+    text.write("unknown,Apple,model,100,USB,photo\n")
+    return io.BytesIO(text.getvalue().encode())
+
+
+async def attributes_count() -> int:
+    async with factory_session() as session:
+        return (await session.execute(select(func.count()).select_from(GoodsAttributeORM))).scalar()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--single", type=int, default=500, help="сколько товаров добавить по одному")
+    parser.add_argument("--chunk", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(1)
+    await create_table()
+
+    started = time.perf_counter()
+    for goods in goods_rows(args.single):
+        goods_id = await insert_goods(
+            goods["category_id"], goods["brand"], goods["name"], goods["price"],
+            goods["characteristics"], goods["photo"]
+        )
+        await select_goods_by_id(goods_id)
+    single = (time.perf_counter() - started) / args.single
+    print(f"по одному (до): {single * 1000:.2f} мс на товар, {single * args.rows:.1f} с на {args.rows} товаров")
+
+    file = csv_file(goods_rows(args.rows))
+    progress_calls = []
+
+    async def progress(result: dict):
+        progress_calls.append(result["imported"])
+
+    attributes = await attributes_count()
+    result = await import_goods(file, "csv", progress, chunk_size=args.chunk)
+    print(
+        f"импорт файла (после): {result['time']:.2f} с на {result['imported']} товаров, "
+        f"пропущено {result['skipped']}, пачек {len(progress_calls)}, "
+        f"слов характеристик {await attributes_count() - attributes}"
+    )
+    print("\n".join(result["errors"]))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
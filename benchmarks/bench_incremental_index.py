@@ -0,0 +1,71 @@
+"""
+Бенчмарк обновления индекса ИИ после изменения одного файла в data.
+
+Полная пересборка (rebuild) против refresh(), который эмбеддит
+только измененные файлы. Эмбеддинги поддельные с задержкой на запрос. Запуск:
+
+    python benchmarks/bench_incremental_index.py --files 10 50 200
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import common  # noqa: F401
+from fake_llm import fake_service_context
+
+from services.index_service import IndexService
+from services.semantic_cache import SemanticCache
+
+
+def make_corpus(files: int) -> Path:
+    data_dir = Path(tempfile.mkdtemp())
+    for number in range(files):
+        (data_dir / f"faq_{number}.txt").write_text(
+            f"Вопрос {number}. Как выбрать товар {number}? " * 40, encoding="utf-8"
+        )
+    return data_dir
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for files in args.files:
+        service_context = fake_service_context(llm_latency=0, embed_latency=args.embed_latency)
+        embed_model = service_context.embed_model
+        data_dir = make_corpus(files)
+        service = IndexService(
+            data_dir=data_dir,
+            persist_dir=tempfile.mkdtemp(),
+            service_context=service_context,
+            cache=SemanticCache(maxsize=0)
+        )
+        service.load()
+
+        (data_dir / "faq_0.txt").write_text("Новый ответ на первый вопрос", encoding="utf-8")
+
+        embed_model.texts = 0
+        full = timed(service.rebuild)
+        full_texts = embed_model.texts
+
+        (data_dir / "faq_1.txt").write_text("Новый ответ на второй вопрос", encoding="utf-8")
+
+        embed_model.texts = 0
+        incremental = timed(service.refresh)
+        print(
+            f"файлов {files:>4}: rebuild {full:6.2f} с ({full_texts} текстов), "
+            f"refresh {incremental:6.2f} с ({embed_model.texts} текстов)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Бенчмарк режима "Вопрос о товаре": индекс на каждый вопрос против IndexService.
+
+Старый answer_question не находил ../storage и заново читал и эмбеддил
+папку data на каждый вопрос. LLM и эмбеддинги поддельные с задержкой,
+похожей на OpenAI. Запуск:
+
+    python benchmarks/bench_index_service.py --questions 5 --embed-latency 0.2
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401
+from fake_llm import fake_service_context
+
+from llama_index import SimpleDirectoryReader, VectorStoreIndex
+
+from services.index_service import IndexService, DATA_DIR
+
+QUESTIONS = ["Как выбрать телефон?", "Какой пылесос лучше?", "Что такое Type-C?"]
+
+
+def old_answer(question: str, service_context) -> str:
+    # Старая реализация: индекс строится заново на каждый вопрос
+    documents = SimpleDirectoryReader(str(DATA_DIR)).load_data()
+    index = VectorStoreIndex.from_documents(documents, service_context=service_context)
+    return index.as_query_engine().query(question).response
+
+
+def measure(answer, questions: list) -> list:
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        answer(question)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    service_context = fake_service_context(args.llm_latency, args.embed_latency)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+
+    old = measure(lambda question: old_answer(question, service_context), questions)
+
+    service = IndexService(persist_dir=tempfile.mkdtemp(), service_context=service_context)
+    started = time.perf_counter()
+    service.load()
+    load_time = time.perf_counter() - started
+    new = measure(service.query, questions)
+
+    print(f"индекс на вопрос (до): первый {old[0]:.2f} с, дальше {statistics.mean(old[1:] or old):.2f} с")
+    print(
+        f"IndexService (после): загрузка {load_time:.2f} с, "
+        f"первый {new[0]:.2f} с, дальше {statistics.mean(new[1:] or new):.2f} с"
+    )
+
+
+if __name__ == "__main__":
+    main()
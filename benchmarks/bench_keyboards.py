@@ -0,0 +1,89 @@
+"""
+Бенчмарк клавиатур брендов: построение из goods_stats и сериализация
+при каждой отправке против keyboard_cache с готовым JSON.
+
+Прежний путь замеряется без кэша запросов и с ним. Отправка
+замеряется до сборки формы запроса (build_form_data), как перед
+запросом к Telegram, сама сеть не участвует. Запуск:
+
+    python benchmarks/bench_keyboards.py --rows 100000 --sends 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import CATEGORIES, seed
+from fake_telegram import fake_bot
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+
+from DataBase.database import engine
+from DataBase.queries.cache import goods_cache
+from DataBase.queries.orm import create_table, select_goods_stats
+from keyboards.goods_keyboard import brands_keyboard, brands_stats_button
+from keyboards.keyboard_cache import PreparedMarkupMiddleware, keyboard_cache
+
+bot = fake_bot(0)
+session = AiohttpSession()
+middleware = PreparedMarkupMiddleware()
+
+
+async def form(bot, method):
+    return session.build_form_data(bot, method)
+
+
+async def send_before(category: str):
+    # Прежний show_brands: goods_stats, новая клавиатура и ее сериализация
+    stats = await select_goods_stats(category=category)
+    method = SendMessage(chat_id=1, text=category, reply_markup=brands_stats_button(category, stats))
+    return session.build_form_data(bot, method)
+
+
+async def send_after(category: str):
+    _, _, markup = await brands_keyboard(category)
+    return await middleware(form, bot, SendMessage(chat_id=1, text=category, reply_markup=markup))
+
+
+async def measure(func, categories: list) -> list:
+    timings = []
+    for category in categories:
+        started = time.perf_counter()
+        await func(category)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(title: str, timings: list):
+    print(f"{title:>28}: среднее {statistics.mean(timings):.3f} мс, p95 {statistics.quantiles(timings, n=20)[-1]:.3f} мс")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--sends", type=int, default=2000)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+
+    categories = [CATEGORIES[index % len(CATEGORIES)] for index in range(args.sends)]
+    for category in CATEGORIES:
+        before, after = await send_before(category), await send_after(category)
+        assert before._fields == after._fields, category
+
+    report("клавиатура брендов (до)", await measure(send_before, categories))
+    # С кэшем запросов остаются только построение и сериализация клавиатуры
+    goods_cache.maxsize = 1024
+    report("до, с кэшем запросов", await measure(send_before, categories))
+    report("keyboard_cache (после)", await measure(send_after, categories))
+    stats = keyboard_cache.stats()
+    print(f"keyboard_cache: построено {stats['builds']}, взято готовых {stats['hits']}")
+
+    await session.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
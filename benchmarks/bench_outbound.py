@@ -0,0 +1,82 @@
+"""
+Бенчмарк планировщика исходящих запросов при всплеске сообщений.
+
+Поддельный Telegram отвечает 429, если бот отправляет больше 30
+сообщений в секунду или больше --chat-limit в секунду в один чат.
+Одновременно идут массовые рассылки (BULK) и ответы пользователям.
+Запуск:
+
+    python benchmarks/bench_outbound.py --chats 40 --bulk 5 --interactive 2
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import common  # noqa: F401
+from fake_telegram import fake_bot
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from services.outbound import OutboundScheduler, bulk_sends
+
+
+async def send(bot, chat_id: int, lane_bulk: bool, results: dict):
+    started = time.perf_counter()
+    try:
+        if lane_bulk:
+            with bulk_sends():
+                await bot.send_message(chat_id=chat_id, text="товар")
+        else:
+            await bot.send_message(chat_id=chat_id, text="ответ")
+    except TelegramRetryAfter:
+        results["lost"] += 1
+        return
+    results["bulk" if lane_bulk else "interactive"].append(time.perf_counter() - started)
+
+
+async def run(args, scheduler) -> dict:
+    bot = fake_bot(latency=0.02, flood_limits=(30, args.chat_limit))
+    if scheduler:
+        bot.session.middleware(scheduler)
+
+    results = {"lost": 0, "bulk": [], "interactive": []}
+    tasks = [
+        send(bot, chat_id, True, results)
+        for chat_id in range(1, args.chats + 1) for _ in range(args.bulk)
+    ]
+    tasks += [
+        send(bot, chat_id, False, results)
+        for chat_id in range(1, args.chats + 1) for _ in range(args.interactive)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    results["elapsed"] = time.perf_counter() - started
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=40)
+    parser.add_argument("--bulk", type=int, default=5)
+    parser.add_argument("--interactive", type=int, default=2)
+    parser.add_argument("--chat-limit", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    for title, scheduler in (("без планировщика", None), ("с планировщиком", OutboundScheduler(chat_burst=3))):
+        results = await run(args, scheduler)
+        delivered = len(results["bulk"]) + len(results["interactive"])
+        interactive = statistics.mean(results["interactive"]) if results["interactive"] else 0
+        bulk = statistics.mean(results["bulk"]) if results["bulk"] else 0
+        print(
+            f"{title:>16}: доставлено {delivered}, потеряно {results['lost']}, {results['elapsed']:.1f} с, "
+            f"ответы {interactive:.2f} с, рассылка {bulk:.2f} с в среднем"
+        )
+        if scheduler:
+            print(f"{'':>16}  {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
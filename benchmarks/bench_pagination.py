@@ -0,0 +1,79 @@
+"""
+Бенчмарк постраничного просмотра товаров.
+
+До: get_goods загружал все товары фильтра и хранил генератор в состоянии.
+После: по курсору загружается только следующая страница и считается остаток.
+Запуск:
+
+    python benchmarks/bench_pagination.py --rows 200000 --pages 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from common import seed
+
+from DataBase.database import engine
+from DataBase.queries.orm import create_table, select_goods, count_goods
+
+PAGE_SIZE = 2
+GOODS_FILTER = {"brand": "apple", "category": "phone", "price": "all", "characteristic": None}
+
+
+async def full_list_session(pages: int) -> tuple:
+    # Прежняя схема: все товары сразу, страницы из списка в памяти
+    started = time.perf_counter()
+    goods = await select_goods(**GOODS_FILTER)
+    first_page = time.perf_counter() - started
+    for page in range(pages):
+        goods[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+    return first_page, time.perf_counter() - started, len(goods)
+
+
+async def keyset_session(pages: int) -> tuple:
+    # Новая схема: страница после курсора и количество оставшихся
+    started = time.perf_counter()
+    state = {"goods_filter": GOODS_FILTER, "last_id": 0, "len": await count_goods(**GOODS_FILTER)}
+    first_page = None
+    for page in range(pages):
+        goods = await select_goods(**GOODS_FILTER, after_id=state["last_id"], limit=PAGE_SIZE)
+        state["last_id"] = goods[-1][0].id
+        await count_goods(**GOODS_FILTER, after_id=state["last_id"])
+        if first_page is None:
+            first_page = time.perf_counter() - started
+    return first_page, time.perf_counter() - started, len(json.dumps(state))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+
+    # Страницы по курсору совпадают с полным списком
+    full_ids = [goods[0].id for goods in await select_goods(**GOODS_FILTER)]
+    keyset_ids, last_id = [], 0
+    while goods := await select_goods(**GOODS_FILTER, after_id=last_id, limit=500):
+        keyset_ids.extend(row[0].id for row in goods)
+        last_id = keyset_ids[-1]
+    assert full_ids == keyset_ids
+
+    for title, session in (("весь список (до)", full_list_session), ("курсор (после)", keyset_session)):
+        results = [await session(args.pages) for _ in range(args.repeat)]
+        print(
+            f"{title:>17}: первая страница {statistics.mean(r[0] for r in results) * 1000:.1f} мс, "
+            f"{args.pages} страниц {statistics.mean(r[1] for r in results) * 1000:.1f} мс"
+        )
+    print(f"В памяти на пользователя: {len(full_ids)} товаров до, курсор {results[-1][2]} байт после")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
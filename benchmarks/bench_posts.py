@@ -0,0 +1,85 @@
+"""
+Бенчмарк таблицы posts: поиск сообщения select_posts_msg без индекса
+(post_id, goods_id) и с ним, затем очистка старых строк пачками.
+
+Заполняет posts строками за --days дней, как будто режим удаления
+открывали без очистки. Запуск:
+
+    python benchmarks/bench_posts.py --rows 300000 --lookups 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from common import sync_engine
+
+from sqlalchemy import insert, text
+
+from DataBase.database import engine
+from DataBase.models import PostsTableORM, utc_now
+from DataBase.queries.orm import create_table, select_posts_msg, count_posts
+from services.posts_purge import PostsPurger
+
+
+def seed_posts(rows: int, days: int, chunk: int = 20000):
+    now = utc_now()
+    with sync_engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            conn.execute(insert(PostsTableORM), [
+                {
+                    "post_id": index // 20,
+                    "message_id": index,
+                    "goods_id": index % 5000,
+                    "created_at": now - timedelta(seconds=random.uniform(0, days * 86400))
+                }
+                for index in range(start, min(start + chunk, rows))
+            ])
+
+
+async def lookups(count: int, rows: int) -> float:
+    timings = []
+    for _ in range(count):
+        index = random.randrange(rows)
+        started = time.perf_counter()
+        await select_posts_msg(index // 20, index % 5000)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    await create_table()
+    seed_posts(args.rows, args.days)
+
+    with sync_engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_posts_post_goods"))
+    before = await lookups(args.lookups, args.rows)
+    with sync_engine.begin() as conn:
+        for index in PostsTableORM.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    after = await lookups(args.lookups, args.rows)
+    print(f"select_posts_msg: без индекса {before * 1000:.2f} мс, с индексом {after * 1000:.2f} мс")
+
+    # Хранение 7 дней, остальное удаляется пачками
+    purger = PostsPurger(ttl=7 * 86400, batch_size=args.batch)
+    purged = await purger.purge()
+    stats = purger.stats()
+    print(
+        f"очистка: удалено {purged} строк за {stats['last_time']:.2f} с "
+        f"({stats['rows_per_second']:.0f} строк/с), осталось {await count_posts()}"
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Бенчмарк фильтра по ценовой категории в select_goods.
+
+Сравнивает два обращения к базе (сначала средняя цена, потом товары)
+с одним запросом, где средняя цена считается подзапросом,
+и проверяет, что результаты совпадают. Запуск:
+
+    python benchmarks/bench_price_tiers.py --rows 50000 --requests 300
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from common import seed, random_filter
+
+from sqlalchemy import select, and_
+
+from DataBase.database import engine, factory_session
+from DataBase.models import GoodsTableORM
+from DataBase.queries.orm import create_table, select_goods, select_avg_price
+
+
+async def two_step_select_goods(brand: str, category: str, price: str):
+    # Прежняя реализация: средняя цена запрашивается отдельно
+    avg_price = await select_avg_price(brand=brand, category=category)
+    stmt = select(GoodsTableORM).where(
+        and_(
+            GoodsTableORM.name.like(f"{brand}%"),
+            GoodsTableORM.category_id.like(f"{category}%")
+        )
+    )
+    if price == "expensive":
+        stmt = stmt.where(GoodsTableORM.price >= avg_price)
+    elif price == "budget":
+        stmt = stmt.where(GoodsTableORM.price <= avg_price)
+
+    async with factory_session() as session:
+        goods = await session.execute(stmt)
+        return goods.all()
+
+
+async def measure(select_func, filters: list) -> list:
+    timings = []
+    for goods_filter in filters:
+        started = time.perf_counter()
+        await select_func(**goods_filter)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+    filters = [random_filter() for _ in range(args.requests)]
+
+    for goods_filter in random.sample(filters, min(20, len(filters))):
+        old = {goods[0].id for goods in await two_step_select_goods(**goods_filter)}
+        new = {goods[0].id for goods in await select_goods(**goods_filter)}
+        assert old == new, goods_filter
+
+    for title, func_ in (("2 запроса (до)", two_step_select_goods), ("1 запрос (после)", select_goods)):
+        timings = await measure(func_, filters)
+        print(
+            f"{title:>17}: среднее {statistics.mean(timings):.2f} мс, "
+            f"p95 {statistics.quantiles(timings, n=20)[-1]:.2f} мс"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
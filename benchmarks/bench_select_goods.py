@@ -0,0 +1,97 @@
+"""
+Бенчмарк конкурентных вызовов select_goods.
+
+Сравнивает старую схему (синхронная сессия внутри корутины)
+с асинхронным движком. Запуск:
+
+    python benchmarks/bench_select_goods.py --rows 20000 --concurrency 200
+
+База данных - временный файл sqlite, поэтому MySQL не нужен.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from common import CATEGORIES, BRANDS, sync_session, seed
+
+from sqlalchemy import select, and_, func
+
+from DataBase.database import engine
+from DataBase.models import GoodsTableORM
+from DataBase.queries.orm import create_table, select_goods
+
+
+async def blocking_select_goods(brand: str, category: str, price: str):
+    # Старая реализация: синхронные запросы блокируют цикл событий
+    with sync_session() as session:
+        avg_price = session.execute(select(func.avg(GoodsTableORM.price)).where(
+            GoodsTableORM.name.like(f"{brand}%"),
+            GoodsTableORM.category_id.like(f"{category}%"))
+        ).scalar() or 0
+        stmt = select(GoodsTableORM).where(
+            and_(
+                GoodsTableORM.name.like(f"{brand}%"),
+                GoodsTableORM.category_id.like(f"{category}%"),
+                GoodsTableORM.price >= avg_price if price == "expensive" else GoodsTableORM.price <= avg_price
+            )
+        )
+        return session.execute(stmt).all()
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    # Измеряем задержку цикла событий, пока идут запросы
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - started - 0.005)
+
+
+async def run(select_func, concurrency: int, requests: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with semaphore:
+            await select_func(
+                brand=random.choice(BRANDS),
+                category=random.choice(CATEGORIES),
+                price=random.choice(["budget", "expensive"])
+            )
+
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+
+    return {
+        "rps": requests / elapsed,
+        "elapsed": elapsed,
+        "max_loop_lag_ms": max(lags, default=0) * 1000
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+
+    for title, func_ in (("sync (до)", blocking_select_goods), ("async (после)", select_goods)):
+        result = await run(func_, args.concurrency, args.requests)
+        print(
+            f"{title:>14}: {result['rps']:8.1f} запросов/с, "
+            f"{result['elapsed']:.2f} с, макс. задержка цикла {result['max_loop_lag_ms']:.1f} мс"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Бенчмарк кэша ответов ИИ на повторяющихся вопросах.
+
+Вопросы - несколько популярных формулировок с разным регистром
+и знаками препинания. LLM и эмбеддинги поддельные с задержкой. Запуск:
+
+    python benchmarks/bench_semantic_cache.py --questions 30
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401
+from fake_llm import fake_service_context
+
+from services.index_service import IndexService
+from services.semantic_cache import SemanticCache
+
+POPULAR = [
+    ["Как выбрать телефон?", "как выбрать телефон", "Как выбрать телефон!!"],
+    ["Какой пылесос лучше?", "какой пылесос лучше"],
+    ["Что такое Type-C?", "что такое type-c"],
+    ["Сколько стоит доставка?", "сколько стоит доставка"]
+]
+
+
+def run(service: IndexService, questions: list) -> list:
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        service.answer(question)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    random.seed(1)
+    questions = [random.choice(random.choice(POPULAR)) for _ in range(args.questions)]
+    service_context = fake_service_context(args.llm_latency, embed_latency=0.05)
+    persist_dir = tempfile.mkdtemp()
+
+    for title, cache in (("без кэша (до)", SemanticCache(maxsize=0)), ("с кэшем (после)", SemanticCache())):
+        service = IndexService(persist_dir=persist_dir, service_context=service_context, cache=cache)
+        service.load()
+        latencies = run(service, questions)
+        print(
+            f"{title:>16}: {sum(latencies):.2f} с на {len(questions)} вопросов, "
+            f"медиана {statistics.median(latencies) * 1000:.0f} мс, "
+            f"вызовов LLM {service.queries}, попаданий {cache.hits}"
+        )
+
+
+if __name__ == "__main__":
+    main()
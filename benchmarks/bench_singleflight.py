@@ -0,0 +1,82 @@
+"""
+Бенчмарк объединения одинаковых одновременных запросов (SingleFlight).
+
+Акция приводит много покупателей в одну категорию сразу после сброса
+кэша: --users одновременных select_goods с одним фильтром, затем
+столько же одновременных одинаковых вопросов к ИИ (поддельный LLM).
+Сравниваются запросы к базе, вызовы LLM и общее время. Запуск:
+
+    python benchmarks/bench_singleflight.py --rows 50000 --users 100
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import common  # noqa: F401
+from common import seed
+from fake_llm import fake_service_context
+
+from sqlalchemy import event
+
+from DataBase.database import engine
+from DataBase.queries.cache import SingleFlight
+from DataBase.queries.orm import create_table, select_goods
+from services.ai_executor import AIExecutor
+from services.index_service import IndexService
+from services.semantic_cache import SemanticCache
+
+FILTER = {"category": "phone", "brand": "Apple", "price": "budget"}
+
+
+async def burst(users: int, call) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(users)))
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    await create_table()
+    seed(args.rows)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *_: statements.append(1))
+
+    # Без декоратора goods_cache.cached - старое поведение при пустом кэше
+    for title, call in (
+            ("каталог, без объединения", lambda: select_goods.__wrapped__(**FILTER)),
+            ("каталог, SingleFlight", lambda: select_goods(**FILTER))
+    ):
+        statements.clear()
+        elapsed = await burst(args.users, call)
+        print(f"{title:>26}: {elapsed:.2f} с, запросов к базе: {len(statements)}")
+
+    service_context = fake_service_context(args.llm_latency, embed_latency=0.05)
+    service = IndexService(
+        persist_dir=tempfile.mkdtemp(), service_context=service_context, cache=SemanticCache(maxsize=0)
+    )
+    service.load()
+    executor = AIExecutor(concurrency=4, timeout=600)
+    flights = SingleFlight()
+    question = "Какой телефон лучше купить?"
+
+    for title, call in (
+            ("ИИ, без объединения", lambda: executor.run(service.answer, question)),
+            ("ИИ, SingleFlight", lambda: flights.run(("question", question), executor.run, service.answer, question))
+    ):
+        queries = service.queries
+        elapsed = await burst(args.users, call)
+        print(f"{title:>26}: {elapsed:.2f} с, вызовов LLM: {service.queries - queries}")
+
+    print(f"объединено вызовов: {flights.stats()['collapsed']} из {flights.stats()['calls']}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
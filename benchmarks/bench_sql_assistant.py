@@ -0,0 +1,83 @@
+"""
+Бенчмарк режима "Запрос о товаре" на повторяющихся вопросах.
+
+Старый answer_request создавал SQLDatabase (отражение схемы) и
+NLSQLTableQueryEngine на каждый вопрос и дважды обращался к LLM.
+SQLAssistant создает их один раз и выполняет сохраненный SQL для
+повторных формулировок. LLM поддельный с задержкой. Запуск:
+
+    python benchmarks/bench_sql_assistant.py --rows 20000 --questions 30
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from common import seed
+from fake_llm import fake_sql_service_context
+
+from llama_index import SQLDatabase
+from llama_index.indices.struct_store import NLSQLTableQueryEngine
+
+from DataBase.database import engine, sync_engine
+from DataBase.queries.orm import create_table
+from services.sql_assistant import SQLAssistant
+
+QUESTIONS = [
+    ["Покажи телефоны дешевле 100000", "покажи телефоны дешевле 100000!", "Покажи  телефоны дешевле 100000?"],
+    ["Какие есть ноутбуки Apple", "какие есть ноутбуки apple?"],
+    ["Самый дорогой телевизор", "самый дорогой телевизор"]
+]
+SQL = "SELECT name, price FROM goods WHERE category_id = 'phone' AND price < 100000 ORDER BY price LIMIT 5"
+
+
+def old_answer(question: str, service_context) -> str:
+    # Старая реализация: схема и движок создаются на каждый вопрос
+    sql_database = SQLDatabase(sync_engine, include_tables=["goods"])
+    return NLSQLTableQueryEngine(sql_database, service_context=service_context).query(question).response
+
+
+def measure(answer, questions: list) -> list:
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        answer(question)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def prepare(rows: int):
+    await create_table()
+    seed(rows)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    asyncio.run(prepare(args.rows))
+    random.seed(1)
+    questions = [random.choice(random.choice(QUESTIONS)) for _ in range(args.questions)]
+    service_context = fake_sql_service_context(SQL, args.llm_latency)
+
+    old = measure(lambda question: old_answer(question, service_context), questions)
+    assistant = SQLAssistant(service_context=service_context)
+    assistant.load()
+    new = measure(assistant.answer, questions)
+
+    for title, latencies in (("на каждый вопрос (до)", old), ("SQLAssistant (после)", new)):
+        print(
+            f"{title:>22}: {sum(latencies):.2f} с на {len(questions)} вопросов, "
+            f"медиана {statistics.median(latencies) * 1000:.1f} мс"
+        )
+    stats = assistant.stats()
+    print(f"SQL из кэша: {stats['hits']}, сгенерировано LLM: {stats['misses']}")
+
+
+if __name__ == "__main__":
+    main()
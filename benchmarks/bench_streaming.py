@@ -0,0 +1,78 @@
+"""
+Бенчмарк потоковых ответов ИИ: одно сообщение после полной генерации
+против заглушки, которая редактируется по мере прихода токенов.
+
+LLM поддельный: --llm-latency до первого токена, затем --tokens токенов
+по --token-latency секунд. Telegram тоже поддельный. Измеряется время
+до первого текста ответа у пользователя (TTFB) и число правок. Запуск:
+
+    python benchmarks/bench_streaming.py --questions 3 --tokens 140
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401
+from fake_llm import fake_service_context
+from fake_telegram import fake_bot, fake_message
+
+from services.ai_executor import AIExecutor
+from services.index_service import IndexService
+from services.semantic_cache import SemanticCache
+from services.streaming import MessageStreamer
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--tokens", type=int, default=140)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--token-latency", type=float, default=0.03)
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    service_context = fake_service_context(args.llm_latency, embed_latency=0.05, max_tokens=args.tokens)
+    service_context.llm.token_latency = args.token_latency
+    service = IndexService(
+        persist_dir=tempfile.mkdtemp(),
+        service_context=service_context,
+        cache=SemanticCache(maxsize=0)
+    )
+    service.load()
+    executor = AIExecutor(concurrency=4, timeout=60)
+    bot = fake_bot(latency=0.05)
+
+    async def blocking(question: str) -> dict:
+        # Старая реализация: ответ отправляется после полной генерации
+        started = time.monotonic()
+        message = fake_message(bot, text=question)
+        answer = await executor.run(service.answer, question)
+        await message.answer(text=answer)
+        elapsed = time.monotonic() - started
+        return {"ttfb": elapsed, "total": elapsed, "edits": 0}
+
+    async def streaming(question: str) -> dict:
+        started = time.monotonic()
+        message = fake_message(bot, text=question)
+        placeholder = await message.answer(text="Думаю над ответом...")
+        streamer = MessageStreamer(placeholder, started, interval=args.interval)
+        async with streamer:
+            answer = await executor.run(service.answer, question, None, streamer.feed)
+        await streamer.finish(answer)
+        return {"ttfb": streamer.ttfb, "total": time.monotonic() - started, "edits": streamer.edits}
+
+    questions = [f"Вопрос номер {number}" for number in range(args.questions)]
+    for title, ask in (("одним сообщением (до)", blocking), ("потоком (после)", streaming)):
+        results = [await ask(question) for question in questions]
+        print(
+            f"{title:>22}: первый текст {statistics.mean(r['ttfb'] for r in results):.2f} с, "
+            f"полный ответ {statistics.mean(r['total'] for r in results):.2f} с, "
+            f"правок на ответ {statistics.mean(r['edits'] for r in results):.1f}"
+        )
+    print(f"первый токен LLM: {service.stats()['first_token']:.2f} с в среднем")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
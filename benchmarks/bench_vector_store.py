@@ -0,0 +1,69 @@
+"""
+Бенчмарк хранилища эмбеддингов: vector_store.json против MmapVectorStore.
+
+Создает SimpleVectorStore со случайными векторами размерности OpenAI,
+сохраняет его в json, конвертирует и сравнивает время загрузки
+и поиска top-k. Запуск:
+
+    python benchmarks/bench_vector_store.py --vectors 2000 --dim 1536
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401
+
+import numpy as np
+from llama_index.vector_stores.simple import SimpleVectorStore, SimpleVectorStoreData
+from llama_index.vector_stores.types import VectorStoreQuery
+
+from services.mmap_vector_store import MmapVectorStore, convert_json_store
+
+
+def measure(load, queries: list) -> dict:
+    started = time.perf_counter()
+    store = load()
+    load_time = time.perf_counter() - started
+
+    latencies, results = [], []
+    for embedding in queries:
+        started = time.perf_counter()
+        results.append(store.query(VectorStoreQuery(query_embedding=embedding, similarity_top_k=2)).ids)
+        latencies.append(time.perf_counter() - started)
+    return {"load": load_time, "query": statistics.median(latencies), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    persist_dir = tempfile.mkdtemp()
+    vectors = rng.standard_normal((args.vectors, args.dim), dtype=np.float32)
+    data = SimpleVectorStoreData(
+        embedding_dict={f"node-{row}": vector.tolist() for row, vector in enumerate(vectors)},
+        text_id_to_ref_doc_id={f"node-{row}": f"doc-{row // 10}" for row in range(args.vectors)},
+        metadata_dict={f"node-{row}": {} for row in range(args.vectors)}
+    )
+    SimpleVectorStore(data).persist(f"{persist_dir}/vector_store.json")
+    del data
+
+    started = time.perf_counter()
+    convert_json_store(persist_dir)
+    print(f"конвертация json -> npy: {time.perf_counter() - started:.2f} с")
+
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32).tolist()
+    json_store = measure(lambda: SimpleVectorStore.from_persist_dir(persist_dir), queries)
+    mmap_store = measure(lambda: MmapVectorStore.from_persist_dir(persist_dir), queries)
+
+    for title, result in (("vector_store.json (до)", json_store), ("MmapVectorStore (после)", mmap_store)):
+        print(f"{title:>24}: загрузка {result['load'] * 1000:8.1f} мс, поиск top-2 {result['query'] * 1000:8.2f} мс")
+    print("результаты совпадают:", json_store["results"] == mmap_store["results"])
+
+
+if __name__ == "__main__":
+    main()
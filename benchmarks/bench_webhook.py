@@ -0,0 +1,100 @@
+"""
+Бенчмарк режима вебхука с разным числом одновременных апдейтов.
+
+Апдейты (/start и нажатия кнопок каталога) отправляются POST запросами
+в aiohttp приложение из services.webhook, как это делает Telegram.
+Бот отвечает через поддельный Telegram с задержкой --latency.
+Запуск:
+
+    python benchmarks/bench_webhook.py --updates 1000 --concurrency 1 10 100 --rows 10000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import seed
+from fake_telegram import fake_bot, fake_message, callback_update
+
+from aiogram import Dispatcher
+from aiogram.types import Update
+from aiohttp.test_utils import TestServer, TestClient
+
+from DataBase.database import engine
+from DataBase.queries.orm import create_table
+from handlers import handlers, goods_handler
+from services.webhook import create_webhook_app
+
+
+def make_update(update_id: int) -> dict:
+    # Чередуем команду /start и кнопку каталога от разных пользователей
+    chat_id = update_id % 500 + 1
+    if update_id % 2:
+        update = callback_update(update_id, "catalog:phone_gadgets", chat_id=chat_id)
+    else:
+        update = Update(update_id=update_id, message=fake_message(None, chat_id=chat_id, text="/start"))
+    return update.model_dump(mode="json", exclude_none=True)
+
+
+async def run(dp: Dispatcher, updates: list, concurrency: int, latency: float) -> dict:
+    bot = fake_bot(latency=latency)
+
+    app = create_webhook_app(dp, bot, concurrency=concurrency)
+    handler = app["webhook_handler"]
+    responses = []
+
+    async with TestClient(TestServer(app)) as client:
+        async def post(update: dict):
+            started = time.perf_counter()
+            response = await client.post("/webhook", json=update)
+            await response.read()
+            responses.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(update) for update in updates))
+        while handler.processed < len(updates):
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        health = await (await client.get("/health")).json()
+
+    return {
+        "elapsed": elapsed,
+        "ups": len(updates) / elapsed,
+        "response_p95_ms": statistics.quantiles(responses, n=20)[-1] * 1000,
+        "failed": health["failed"],
+        "calls": sum(bot.session.calls.values())
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Кнопки категорий строятся по goods_stats
+    await create_table()
+    seed(args.rows)
+
+    # Роутеры каталога без ассистента, которому нужен OpenAI
+    dp = Dispatcher()
+    dp.include_router(handlers.router)
+    dp.include_router(goods_handler.router)
+
+    updates = [make_update(update_id) for update_id in range(1, args.updates + 1)]
+    for concurrency in args.concurrency:
+        result = await run(dp, updates, concurrency, args.latency)
+        print(
+            f"concurrency={concurrency:>4}: {result['ups']:8.1f} апдейтов/с, {result['elapsed']:.2f} с, "
+            f"p95 ответа Telegram {result['response_p95_ms']:.1f} мс, "
+            f"запросов к API {result['calls']}, ошибок {result['failed']}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
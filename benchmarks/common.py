@@ -0,0 +1,64 @@
+"""
+Общие функции для бенчмарков: временная база sqlite и заполнение товарами.
+
+Модуль нужно импортировать до DataBase, так как он задает DB_URL.
+"""
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{DB_FILE}")
+os.environ.setdefault("DB_ECHO", "0")
+# Кэш запросов отключен, чтобы замерять саму базу данных
+os.environ.setdefault("CACHE_SIZE", "0")
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from DataBase.database import sync_engine  # noqa: E402
+from DataBase.migrations import fill_goods_stats  # noqa: E402
+from DataBase.models import GoodsTableORM  # noqa: E402
+
+CATEGORIES = ["phone", "watch", "charger", "case", "laptop", "tv"]
+BRANDS = ["Apple", "Samsung", "Xiaomi", "Huawei"]
+CHARACTERISTICS = ["USB Type-C, 128 GB", "Micro USB, 2 A", "Lightning, 20 W"]
+
+sync_session = sessionmaker(sync_engine)
+
+
+def random_goods(index: int) -> dict:
+    brand = random.choice(BRANDS)
+    return {
+        "category_id": random.choice(CATEGORIES),
+        "brand": brand.lower(),
+        "name": f"{brand} model {index}",
+        "price": random.randint(10, 2000) * 100,
+        "characteristics": random.choice(CHARACTERISTICS),
+        "photo": "photo"
+    }
+
+
+def seed(rows: int, chunk: int = 10000):
+    # Заполняем таблицу случайными товарами
+    for start in range(0, rows, chunk):
+        with sync_session() as session:
+            with session.begin():
+                session.execute(
+                    insert(GoodsTableORM),
+                    [random_goods(index) for index in range(start, min(start + chunk, rows))]
+                )
+    # Товары добавлены в обход insert_goods, поэтому goods_stats пересчитывается целиком
+    with sync_engine.begin() as conn:
+        fill_goods_stats(conn)
+
+
+def random_filter() -> dict:
+    return {
+        "brand": random.choice(BRANDS),
+        "category": random.choice(CATEGORIES),
+        "price": random.choice(["budget", "expensive", "all"])
+    }
@@ -0,0 +1,97 @@
+"""
+Поддельные LLM и эмбеддинги OpenAI для бенчмарков ИИ.
+
+Работают без сети с заданной задержкой. Эмбеддинг - мешок слов,
+захэшированный в embed_dim измерений, поэтому похожие по словам
+тексты получают близкие векторы, как у настоящей модели.
+"""
+import hashlib
+import re
+import time
+from typing import Any, List
+
+import numpy as np
+
+from llama_index import MockEmbedding, ServiceContext
+from llama_index.llms import MockLLM, CompletionResponse
+
+
+class SlowEmbedding(MockEmbedding):
+    latency: float = 0.1
+    # Сколько текстов документов отправлено на эмбеддинг
+    texts: int = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.embed_dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.embed_dim] += 1
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        self.texts += 1
+        return self._vector(text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        # Один запрос на пачку текстов, как у OpenAIEmbedding
+        time.sleep(self.latency)
+        self.texts += len(texts)
+        return [self._vector(text) for text in texts]
+
+
+class SlowLLM(MockLLM):
+    latency: float = 1.0
+    token_latency: float = 0.02
+
+    def complete(self, prompt: str, **kwargs: Any) -> CompletionResponse:
+        # Полный ответ ждет генерации всех токенов, как и stream_complete
+        time.sleep(self.latency + self.token_latency * (self.max_tokens or 20))
+        return CompletionResponse(text="Ответ: " + " ".join(["текст"] * (self.max_tokens or 20)))
+
+    def stream_complete(self, prompt: str, **kwargs: Any):
+        def gen():
+            time.sleep(self.latency)
+            text = "Ответ:"
+            for _ in range(self.max_tokens or 20):
+                time.sleep(self.token_latency)
+                text += " текст"
+                yield CompletionResponse(text=text, delta=" текст")
+        return gen()
+
+
+class SQLLLM(SlowLLM):
+    # На промпт text-to-SQL отвечает запросом sql, на остальные - текстом
+    sql: str = "SELECT name, price FROM goods LIMIT 5"
+
+    def complete(self, prompt: str, **kwargs: Any) -> CompletionResponse:
+        if prompt.rstrip().endswith("SQLQuery:"):
+            time.sleep(self.latency)
+            return CompletionResponse(text=f"{self.sql}\nSQLResult:")
+        return super().complete(prompt, **kwargs)
+
+
+def fake_service_context(
+        llm_latency: float = 1.0,
+        embed_latency: float = 0.1,
+        embed_dim: int = 256,
+        max_tokens: int = 20
+) -> ServiceContext:
+    llm = SlowLLM(max_tokens=max_tokens)
+    llm.latency = llm_latency
+    return ServiceContext.from_defaults(
+        llm=llm,
+        embed_model=SlowEmbedding(embed_dim=embed_dim, latency=embed_latency)
+    )
+
+
+def fake_sql_service_context(sql: str, llm_latency: float = 1.0) -> ServiceContext:
+    llm = SQLLLM(max_tokens=20)
+    llm.latency = llm_latency
+    llm.sql = sql
+    return ServiceContext.from_defaults(llm=llm, embed_model=SlowEmbedding(embed_dim=8, latency=0))
@@ -0,0 +1,119 @@
+"""
+Поддельный Telegram Bot API для бенчмарков.
+
+FakeTelegramSession отвечает на запросы бота без сети с заданной задержкой
+и считает вызовы каждого метода. Ответы проходят через check_response,
+поэтому бот получает обычные объекты aiogram.
+"""
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict, deque
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod, SendMediaGroup, GetMe
+from aiogram.types import Message, Chat, User, CallbackQuery, Update
+
+TOKEN = "123456:fake-token"
+
+
+class FakeTelegramSession(BaseSession):
+    """
+    :param latency: задержка ответа в секундах
+    :param flood_limits: (сообщений в секунду на бота, сообщений в секунду на чат),
+                         при превышении отвечает ошибкой 429 как Telegram
+    """
+
+    def __init__(self, latency: float = 0.05, flood_limits: Optional[tuple] = None):
+        super().__init__()
+        self.latency = latency
+        self.flood_limits = flood_limits
+        self.calls = Counter()
+        self.flood_errors = 0
+        self._message_id = 1000
+        self._sent = deque()
+        self._chat_sent = defaultdict(deque)
+
+    def _is_flood(self, chat_id) -> bool:
+        now = time.monotonic()
+        global_limit, chat_limit = self.flood_limits
+        for sent, limit in ((self._sent, global_limit), (self._chat_sent[chat_id], chat_limit)):
+            while sent and sent[0] < now - 1:
+                sent.popleft()
+            if len(sent) >= limit:
+                return True
+        self._sent.append(now)
+        self._chat_sent[chat_id].append(now)
+        return False
+
+    def _message(self, method: TelegramMethod, photo: bool = False) -> dict:
+        self._message_id += 1
+        message = {
+            "message_id": getattr(method, "message_id", None) or self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": getattr(method, "chat_id", None) or 1, "type": "private"},
+            "text": getattr(method, "text", None) or ""
+        }
+        if photo:
+            message["photo"] = [{"file_id": f"file-{self._message_id}", "file_unique_id": "u", "width": 1, "height": 1}]
+        return message
+
+    def _result(self, method: TelegramMethod):
+        returning = str(method.__returning__)
+        if isinstance(method, SendMediaGroup):
+            return [self._message(method, photo=True) for _ in method.media]
+        if isinstance(method, GetMe):
+            return {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"}
+        if "Message" in returning:
+            return self._message(method, photo=hasattr(method, "photo") or hasattr(method, "media"))
+        return True
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None):
+        self.calls[type(method).__name__] += 1
+        await asyncio.sleep(self.latency)
+
+        chat_id = getattr(method, "chat_id", None)
+        if self.flood_limits and chat_id is not None and self._is_flood(chat_id):
+            self.flood_errors += 1
+            content = json.dumps({
+                "ok": False, "error_code": 429, "description": "Too Many Requests", "parameters": {"retry_after": 1}
+            })
+            return self.check_response(bot, method, 429, content).result
+
+        content = json.dumps({"ok": True, "result": self._result(method)})
+        return self.check_response(bot, method, 200, content).result
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def fake_bot(latency: float = 0.05, flood_limits: Optional[tuple] = None) -> Bot:
+    return Bot(token=TOKEN, session=FakeTelegramSession(latency, flood_limits))
+
+
+def fake_message(bot: Bot, chat_id: int = 1, text: str = "", message_id: int = 1) -> Message:
+    return Message(
+        message_id=message_id,
+        date=int(time.time()),
+        chat=Chat(id=chat_id, type="private"),
+        from_user=User(id=chat_id, is_bot=False, first_name="user"),
+        text=text
+    ).as_(bot)
+
+
+def callback_update(update_id: int, data: str, chat_id: int = 1) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=User(id=chat_id, is_bot=False, first_name="user"),
+            chat_instance="1",
+            message=fake_message(None, chat_id=chat_id),
+            data=data
+        )
+    )
@@ -1,25 +1,52 @@
 from aiogram import Bot, Router, F
-from aiogram.filters import Command, BaseFilter
+from aiogram.filters import Command, CommandObject, BaseFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from aiogram.types.input_media_photo import InputMediaPhoto
-from aiogram.types import URLInputFile
 
 from keyboards.admin_keyboard import (
     EditCatalogCallback,
     EditCategoryCallback,
     DeleteGoodsCallback,
+    BulkDeleteCallback,
+    BULK_PAGE_SIZE,
     catalog_button,
     operating_mode_button,
     category_button_dict,
     delete_goods_button,
-    brands
+    bulk_delete_button,
+    brands_keyboard
 )
-from DataBase.queries.orm import select_goods, insert_goods, delete_goods_orm, insert_posts, select_posts_msg
-from text import category_translate_dict, goods_translate_dict, goods_text
+from DataBase.queries.orm import (
+    select_goods,
+    count_goods,
+    select_goods_by_id,
+    insert_goods,
+    delete_goods_orm,
+    delete_goods_many,
+    insert_posts,
+    select_posts_msg,
+    count_posts
+)
+from DataBase.queries.cache import goods_cache
+from keyboards.goods_keyboard import brand_fits_callback
+from keyboards.keyboard_cache import keyboard_cache
+from services.ai_executor import ai_executor, ai_flights
+from services.goods_album import send_goods, goods_caption, ALBUM_SIZE
+from services.goods_import import import_goods, import_format, FIELDS
+from services.index_service import index_service
+from services.semantic_cache import answer_cache
+from services.sql_assistant import sql_assistant
+from services.streaming import stream_metrics, EDIT_INTERVAL
+from services.media_cache import media_cache
+from services.outbound import outbound_scheduler
+from services.posts_purge import posts_purger
+from text import category_translate_dict, goods_translate_dict
 from typing import Optional, Tuple
+import asyncio
 import os
+import time
 
 
 class IsAdmin(BaseFilter):
@@ -42,6 +69,16 @@ class GoodsData(StatesGroup):
     choose_photo = State()
 
 
+class BulkDelete(StatesGroup):
+    # Список товаров с отметками для удаления
+    select = State()
+
+
+class ImportGoods(StatesGroup):
+    # Ожидание файла после команды /import
+    document = State()
+
+
 router = Router()
 router.message.filter(IsAdmin())
 
@@ -54,6 +91,9 @@ async def show_delete_goods(callback: CallbackQuery, goods_list: list) -> Option
     :param callback: для отправки запросов
     :param goods_list: список товаров
     :return: возвращает данные, необходимые для нахождения и удаления.
+
+    Товары отправляются альбомами, а после каждого альбома
+    идет одно сообщение с кнопками удаления его товаров.
     """
     # ID поста
     post_id = callback.message.message_id
@@ -65,20 +105,16 @@ async def show_delete_goods(callback: CallbackQuery, goods_list: list) -> Option
     if not goods_list:
         return
 
-    for goods_tuple in goods_list:
-        goods = goods_tuple[0]
-        message = await callback.message.answer_photo(
-            photo=goods.photo,
-            caption=goods_text.format(
-                name=goods.name,
-                price=goods.price,
-                characteristics=goods.characteristics
-            ),
-            reply_markup=delete_goods_button(post_id=post_id, goods_id=goods.id)
-
+    for start in range(0, len(goods_list), ALBUM_SIZE):
+        album = [goods_tuple[0] for goods_tuple in goods_list[start:start + ALBUM_SIZE]]
+        messages = await send_goods(callback.message, album)
+        await callback.message.answer(
+            text="Выберите товар для удаления:",
+            reply_markup=delete_goods_button(post_id=post_id, goods_list=album)
         )
-        goods_ids.append(goods.id)
-        message_ids.append(message.message_id)
+
+        goods_ids.extend(goods.id for goods in album)
+        message_ids.extend(message.message_id for message in messages)
 
     return post_id, message_ids, goods_ids
 
@@ -97,6 +133,160 @@ async def cmd_admin(message: Message):
     )
 
 
+@router.message(Command("stats"))
+async def cmd_stats(message: Message):
+    """
+    Показывает счетчики кэша каталога, очереди отправки и индекса ИИ
+    """
+    cache = goods_cache.stats()
+    keyboards = keyboard_cache.stats()
+    outbound = outbound_scheduler.stats()
+    ai = index_service.stats()
+    ai_queue = ai_executor.stats()
+    ai_cache = answer_cache.stats()
+    sql_cache = sql_assistant.stats()
+    stream = stream_metrics.stats()
+    flights = ai_flights.stats()
+    purge = posts_purger.stats()
+    posts = await count_posts()
+    rate = purge["rows_per_second"]
+    await message.answer(
+        text="Кэш каталога:\n"
+             f"Записей: {cache['size']}\n"
+             f"Попаданий: {cache['hits']}, промахов: {cache['misses']} ({cache['hit_rate']:.0%})\n"
+             f"Сброшено: {cache['invalidated']}, объединено одинаковых запросов: {cache['collapsed']}\n"
+             f"Клавиатуры: {keyboards['size']}, взято готовых: {keyboards['hits']}, "
+             f"построено: {keyboards['builds']}\n\n"
+             "Отправка сообщений:\n"
+             f"Отправлено: {outbound['sent']}, повторов после RetryAfter: {outbound['retried']}\n"
+             f"В очереди: {outbound['queue']}, макс. ожидание: {outbound['max_wait']:.1f} с\n\n"
+             "Индекс ИИ:\n"
+             f"Загрузка: {seconds(ai['load_time'])}, вопросов: {ai['queries']}\n"
+             f"Первый ответ: {seconds(ai['first_latency'])}, "
+             f"дальше в среднем: {seconds(ai['steady_latency'])}\n"
+             f"Первый токен LLM: {seconds(ai['first_token'])} в среднем\n"
+             f"Первый текст у пользователя: {seconds(stream['avg_ttfb'])} в среднем, "
+             f"{seconds(stream['max_ttfb'])} макс., полный ответ: {seconds(stream['avg_total'])}\n"
+             f"В очереди: {ai_queue['queue']}, выполняется: {ai_queue['running']}, "
+             f"таймаутов: {ai_queue['timed_out']}\n"
+             f"Ожидание в очереди: {seconds(ai_queue['avg_wait'])} в среднем, "
+             f"{seconds(ai_queue['max_wait'])} макс.\n"
+             f"Одинаковых вопросов объединено: {flights['collapsed']} из {flights['calls']}\n"
+             f"Кэш ответов: {ai_cache['size']} записей, попаданий {ai_cache['hits']}, "
+             f"промахов {ai_cache['misses']} ({ai_cache['hit_rate']:.0%})\n"
+             f"Кэш SQL: {sql_cache['size']} запросов, повторно использовано {sql_cache['hits']}, "
+             f"сгенерировано {sql_cache['misses']}\n"
+             f"SQL отклонено: {sql_cache.get('rejected', 0)}, с ошибкой или по таймауту: "
+             f"{sql_cache.get('failed', 0)}, медленных: {sql_cache.get('slow', 0)}\n\n"
+             "Таблица posts:\n"
+             f"Строк: {posts}, удалено старых: {purge['purged']} за {purge['runs']} проходов\n"
+             f"Последний проход: {purge['last_purged']} строк за {seconds(purge['last_time'])}, "
+             f"скорость: {'-' if rate is None else f'{rate:.0f} строк/с'}"
+    )
+
+
+def seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f} с"
+
+
+@router.message(Command("reindex"))
+async def cmd_reindex(message: Message, command: CommandObject):
+    """
+    Обновляет индекс ИИ после изменения файлов в папке data.
+    Эмбеддятся только новые и измененные файлы,
+    "/reindex full" строит индекс заново.
+    Кэш ответов ИИ при этом очищается
+    """
+    await message.answer("Обновляю индекс...")
+    started = time.perf_counter()
+    if command.args == "full":
+        await asyncio.to_thread(index_service.rebuild)
+        result = {"rebuilt": True}
+    else:
+        result = await asyncio.to_thread(index_service.refresh)
+
+    if result["rebuilt"]:
+        text = "Индекс перестроен"
+    else:
+        text = (
+            f"Индекс обновлен: новых файлов {result['added']}, измененных {result['changed']}, "
+            f"удаленных {result['removed']}, без изменений {result['unchanged']}"
+        )
+    await message.answer(f"{text} за {time.perf_counter() - started:.1f} с")
+
+
+@router.message(Command("import"), F.document)
+async def cmd_import_document(message: Message, bot: Bot):
+    # Файл отправлен сразу с подписью /import
+    await import_document(message, bot)
+
+
+@router.message(Command("import"))
+async def cmd_import(message: Message, state: FSMContext):
+    """
+    Импорт товаров из файла CSV или JSONL
+    """
+    await state.set_state(ImportGoods.document)
+    await message.answer(
+        "Отправьте файл .csv или .jsonl с полями:\n"
+        f"{', '.join(FIELDS)}\n"
+        "category_id - категория на английском (phone, tv, ...), photo - file_id или ссылка на фото"
+    )
+
+
+@router.message(ImportGoods.document, F.document)
+async def get_import_document(message: Message, bot: Bot, state: FSMContext):
+    await state.clear()
+    await import_document(message, bot)
+
+
+@router.message(Command("stop"), ImportGoods.document)
+async def stop_import(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("Импорт отменен")
+
+
+@router.message(ImportGoods.document)
+async def wrong_import_document(message: Message):
+    await message.answer("Нужен файл .csv или .jsonl, /stop - отмена")
+
+
+async def import_document(message: Message, bot: Bot):
+    """
+    Скачивает файл и добавляет товары пачками.
+
+    Сообщение о ходе импорта обновляется не чаще
+    раза в EDIT_INTERVAL секунд, в конце в нем итог
+    и первые ошибки по номерам строк.
+    """
+    file_format = import_format(message.document.file_name)
+    if file_format is None:
+        await message.answer("Поддерживаются только файлы .csv и .jsonl")
+        return
+
+    status = await message.answer("Загружаю файл...")
+    file = await bot.download(message.document)
+    last_edit = time.monotonic()
+
+    async def progress(result: dict):
+        nonlocal last_edit
+        if time.monotonic() - last_edit >= EDIT_INTERVAL:
+            last_edit = time.monotonic()
+            await status.edit_text(
+                f"Импорт...\nДобавлено товаров: {result['imported']}, пропущено строк: {result['skipped']}"
+            )
+
+    result = await import_goods(file, file_format, progress)
+    text = (
+        f"Импорт завершен за {result['time']:.1f} с\n"
+        f"Добавлено товаров: {result['imported']}\n"
+        f"Пропущено строк: {result['skipped']}"
+    )
+    if result["errors"]:
+        text += "\n\nОшибки:\n" + "\n".join(result["errors"])
+    await status.edit_text(text)
+
+
 @router.callback_query(EditCatalogCallback.filter())
 async def show_category(callback: CallbackQuery, callback_data: EditCatalogCallback):
     await callback.message.answer(
@@ -111,7 +301,7 @@ async def show_brands(callback: CallbackQuery, callback_data: EditCategoryCallba
     await state.update_data(choose_category=callback_data.category)
     await callback.message.answer(
         text=f"{goods_translate_dict[callback_data.category]}\nВыберите производителя",
-        reply_markup=brands[callback_data.category]
+        reply_markup=await brands_keyboard(callback_data.category)
     )
 
     await state.set_state(GoodsData.choose_brand)
@@ -175,21 +365,149 @@ async def remove_goods(callback: CallbackQuery, callback_data: DeleteGoodsCallba
     await delete_goods_orm(callback_data.goods_id)
     # Через id и post находим id сообщения в бд
     message_id = await select_posts_msg(callback_data.post_id, callback_data.goods_id)
+    if message_id is None:
+        # Строка posts уже удалена как устаревшая, товар удален, но сообщение не изменить
+        await callback.answer("Товар удален")
+        return
 
-    # Если человек нажал на кнопку удаления, то мы его изменяем
-    await bot.edit_message_media(
+    # Если человек нажал на кнопку удаления, то мы его изменяем.
+    # Картинка загружается в Telegram один раз, дальше отправляется ее file_id
+    await media_cache.use("removed_goods", lambda photo: bot.edit_message_media(
         chat_id=callback.message.chat.id,
         message_id=message_id,
-        media=InputMediaPhoto(media=URLInputFile(
-            url="https://fastly.picsum.photos/id/329/400/300.jpg?hmac=CwK66llmWRlHvdMJ_jhsKnCDRFAyBMngiuHWYLQvEfQ",
-            filename="remove_image.png"
-        ),
-            caption="Фотография был уничтожен"
-        )
+        media=InputMediaPhoto(media=photo, caption="Фотография был уничтожен")
+    ))
+    await callback.answer()
+
+
+def bulk_delete_text(total: int, selected: list) -> str:
+    return f"Отметьте товары для удаления\nВыбрано: {len(selected)} из {total}"
+
+
+async def bulk_delete_page(data: dict, page: int) -> tuple:
+    """
+    Страница списка удаления из базы по курсору after_id
+
+    В состоянии хранятся курсоры открытых страниц (bulk_cursors),
+    курсор еще не открытой страницы находится переходом по
+    страницам вперед. Страница за последней заменяется последней.
+
+    :return: (номер страницы, товары в виде [id, name, price], курсоры)
+    """
+    goods_filter = {"category": data["bulk_category"], "brand": data["bulk_brand"]}
+    cursors = list(data["bulk_cursors"])
+    while len(cursors) <= page:
+        goods_list = await select_goods(**goods_filter, after_id=cursors[-1], limit=BULK_PAGE_SIZE)
+        if len(goods_list) < BULK_PAGE_SIZE:
+            break
+        cursors.append(goods_list[-1][0].id)
+
+    page = min(page, len(cursors) - 1)
+    goods_list = await select_goods(**goods_filter, after_id=cursors[page], limit=BULK_PAGE_SIZE)
+    if not goods_list and page:
+        # Товары удалили, пока список был открыт
+        page, cursors = 0, [0]
+        goods_list = await select_goods(**goods_filter, after_id=0, limit=BULK_PAGE_SIZE)
+    return page, [[goods.id, goods.name, goods.price] for goods, in goods_list], cursors
+
+
+@router.callback_query(F.data == "bulk_delete_goods")
+async def bulk_delete_goods(callback: CallbackQuery, state: FSMContext):
+    """
+    Режим удаления нескольких товаров.
+
+    Вместо карточки на каждый товар отправляется одно сообщение
+    со списком по страницам, нажатия только отмечают товары,
+    а удаление выбранных - один запрос к базе и одна правка сообщения.
+    В состоянии хранятся только фильтры, курсоры страниц и отметки,
+    сами товары каждой страницы берутся из базы.
+    """
+    product = await state.get_data()
+    category, brand = product.get("choose_category"), product.get("choose_brand")
+    if category is None or brand is None:
+        await callback.message.answer("Выбор категории сброшен, начните заново: /admin")
+        await state.clear()
+        await callback.answer()
+        return
+
+    total = await count_goods(category=category, brand=brand)
+    await callback.message.edit_text(text="Режим: удаления нескольких товаров")
+    if not total:
+        await callback.message.answer("Товар не найден")
+        await state.clear()
+        await callback.answer()
+        return
+
+    data = {
+        "bulk_category": category,
+        "bulk_brand": brand,
+        "bulk_cursors": [0],
+        "bulk_selected": [],
+        "bulk_page": 0
+    }
+    _, goods, cursors = await bulk_delete_page(data, 0)
+    await state.set_state(BulkDelete.select)
+    await state.set_data(dict(data, bulk_cursors=cursors))
+    await callback.message.answer(
+        text=bulk_delete_text(total, []),
+        reply_markup=bulk_delete_button(goods, set(), page=0, total=total)
+    )
+    await callback.answer()
+
+
+@router.callback_query(BulkDeleteCallback.filter(), BulkDelete.select)
+async def bulk_delete_action(callback: CallbackQuery, callback_data: BulkDeleteCallback, state: FSMContext):
+    """
+    Отметки, страницы и удаление выбранных товаров.
+    Каждое нажатие - одна правка сообщения со списком.
+    """
+    data = await state.get_data()
+    selected = set(data["bulk_selected"])
+
+    if callback_data.action == "cancel":
+        await callback.message.edit_text(text="Удаление отменено", reply_markup=None)
+        await state.clear()
+        await callback.answer()
+        return
+
+    if callback_data.action == "delete":
+        if not selected:
+            await callback.answer("Ничего не выбрано")
+            return
+        deleted = await delete_goods_many(sorted(selected))
+        await callback.message.edit_text(text=f"Удалено товаров: {deleted}", reply_markup=None)
+        await state.clear()
+        await callback.answer()
+        return
+
+    total = await count_goods(category=data["bulk_category"], brand=data["bulk_brand"])
+    if callback_data.action == "toggle":
+        selected ^= {callback_data.goods_id}
+    elif callback_data.action == "all":
+        goods_list = await select_goods(category=data["bulk_category"], brand=data["bulk_brand"])
+        ids = {goods.id for goods, in goods_list}
+        selected = set() if selected == ids else ids
+
+    page, goods, cursors = await bulk_delete_page(data, callback_data.page)
+    if selected == set(data["bulk_selected"]) and page == data["bulk_page"]:
+        # Telegram не дает отправить правку без изменений
+        await callback.answer()
+        return
+
+    await state.update_data(bulk_selected=sorted(selected), bulk_page=page, bulk_cursors=cursors)
+    await callback.message.edit_text(
+        text=bulk_delete_text(total, selected),
+        reply_markup=bulk_delete_button(goods, selected, page, total)
     )
     await callback.answer()
 
 
+@router.callback_query(BulkDeleteCallback.filter())
+async def bulk_delete_expired(callback: CallbackQuery):
+    # Состояние уже очищено, например после перезапуска бота
+    await callback.answer("Список устарел, выберите режим удаления заново", show_alert=True)
+
+
 @router.callback_query(F.data == "add_goods")
 async def add_goods(callback: CallbackQuery, state: FSMContext):
     """
@@ -200,6 +518,21 @@ async def add_goods(callback: CallbackQuery, state: FSMContext):
 
     Если выбрать режим добавления, то состояние не очищается
     """
+    product = await state.get_data()
+    category, brand = product.get("choose_category"), product.get("choose_brand")
+    if category is None or brand is None:
+        # Состояние очищено или устарело, выбор категории и бренда начинается заново
+        await callback.message.answer("Выбор категории сброшен, начните заново: /admin")
+        await state.clear()
+        await callback.answer()
+        return
+    # Для такого бренда не получится кнопка у покупателя
+    if not brand_fits_callback(brand, category):
+        await callback.message.answer("Бренд не может содержать \":\" и должен быть короче, выберите другой")
+        await state.set_state(GoodsData.choose_brand)
+        await callback.answer()
+        return
+
     await callback.message.edit_text(text="Режим: добавления")
     await callback.message.answer(
         text="Добавление нового товара...\nВведите модель товара"
@@ -238,32 +571,23 @@ async def get_photo(message: Message, state: FSMContext):
     product = await state.get_data()
 
     # Добавляем в бд новый товар
-    await insert_goods(
+    goods_id = await insert_goods(
         product["choose_category"], product["choose_brand"],
         product["choose_name"], int(product["choose_price"]),
         product["choose_characteristics"], product["choose_photo"]
     )
     # Проверяем добавленный новый товар
-    await show_result(message, product)
+    await show_result(message, goods_id)
     await state.clear()
 
 
-async def show_result(message: Message, product: dict):
+async def show_result(message: Message, goods_id: int):
     """
     Проверяем добавленный в базе данных товар
     :param message:
-    :param product: Словарь хранящий данные о продукте
+    :param goods_id: ID добавленного товара
     :return:
     """
-    name = product["choose_brand"] + " " + product["choose_name"]
-    goods_tuple = await select_goods(brand=name, action=0)
-    goods = goods_tuple[0]
-    await message.answer_photo(
-        goods.photo,
-        caption=goods_text.format(
-            name=goods.name,
-            price=goods.price,
-            characteristics=goods.characteristics
-        )
-    )
+    goods = await select_goods_by_id(goods_id)
+    await message.answer_photo(goods.photo, caption=goods_caption(goods))
     await message.answer("Поздравляю все прошло успешно 🥳")
\ No newline at end of file
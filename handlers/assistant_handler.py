@@ -10,20 +10,14 @@ from aiogram.types import (
     InlineKeyboardMarkup,
 )
 
-from llama_index import (
-    VectorStoreIndex,
-    SimpleDirectoryReader,
-    StorageContext,
-    load_index_from_storage,
-    ServiceContext
-)
-from llama_index.indices.struct_store import NLSQLTableQueryEngine
-from llama_index.llms import OpenAI
-from DataBase.database import engine
-from llama_index import SQLDatabase
-
+from services.ai_executor import ai_executor, ai_flights
+from services.index_service import index_service
+from services.sql_assistant import sql_assistant, normalize_request
+from services.streaming import EMPTY_ANSWER, MessageStreamer, STREAMING
 from text import ai_settings
-import os
+from typing import Callable, Optional
+import asyncio
+import time
 
 
 class QuestionType(CallbackData, prefix="question"):
@@ -58,37 +52,26 @@ def get_ai_button() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=button)
 
 
-async def answer_question(question: str) -> str:
+async def answer_question(question: str, on_text: Optional[Callable[[str], None]] = None) -> str:
     """
     Асинхронная функция для обработки вопроса
     пользователя
 
     :param question:
-
-    Если в корневой папке не находится папка
-    storage, то мы ищем папку storage чтобы
-    прочитать находящийся внутри данные.
-    И создаем storage.
-
-    А если файл с названием storage все таки
-    находится в корневой папке, то получаем
-    данные из него.
-    """
-    llm = OpenAI(temperature=0, model="gpt-3.5-turbo", max_tokens=140)
-    service_context = ServiceContext.from_defaults(llm=llm)
-
-    if not os.path.exists("../storage"):
-        document = SimpleDirectoryReader("data").load_data()
-        index = VectorStoreIndex(document, service_context=service_context)
-        index.storage_context.persist()
-    else:
-        storage_context = StorageContext.from_defaults(persist_dir="./storage")
-        index = load_index_from_storage(storage_context, service_context=service_context)
-
-    query_engine = index.as_query_engine()
-    response = query_engine.query(question)
-
-    return response.response
+    :param on_text: получает ответ по частям по мере генерации
+
+    Индекс базы знаний из папки data загружается
+    один раз при запуске бота (services.index_service),
+    здесь используется уже готовый движок запросов.
+    Запрос выполняется в пуле потоков ai_executor.
+    На похожие вопросы ответ берется из кэша, а одинаковые
+    вопросы, заданные одновременно, ждут один запрос (on_text
+    получает текст только у первого из них).
+    """
+    return await ai_flights.run(
+        ("question", normalize_request(question)),
+        ai_executor.run, index_service.answer, question, ai_settings.format(question), on_text
+    )
 
 
 async def answer_request(question: str) -> str:
@@ -97,14 +80,17 @@ async def answer_request(question: str) -> str:
     sql запросы, чтобы получить данные о товарах.
 
     :param question:
-    """
-    # Подключаем движок алхимий и название таблицы
-    sql_database = SQLDatabase(engine, include_tables=["goods"])
-
-    query_engine = NLSQLTableQueryEngine(sql_database)
-    response = query_engine.query(question)
 
-    return response.response
+    Движок запросов к таблице goods создается один раз
+    (services.sql_assistant), повторный вопрос выполняет
+    сохраненный SQL без обращения к LLM.
+    Запрос выполняется в пуле потоков ai_executor,
+    одинаковые вопросы, заданные одновременно, ждут один запрос.
+    """
+    return await ai_flights.run(
+        ("request", normalize_request(question)),
+        ai_executor.run, sql_assistant.answer, question, ai_settings.format(question)
+    )
 
 
 @router.message(Command("stop"), AIHelper.question_type)
@@ -163,16 +149,36 @@ async def answer_user(message: Message, state: FSMContext):
     :param state: хранит информацию о режиме работы
     """
 
-    # Настрайвается на корректный ответ
-    question = ai_settings.format(message.text)
+    # Настройки ответа (ai_settings) добавляются к вопросу в answer_question и answer_request
+    question = message.text
     data = await state.get_data()
 
-    if data["question_type"] == "question":
-        answer = await answer_question(question)
-    else:
-        answer = await answer_request(question)
-
-    await message.answer(text=answer, reply_markup=get_ai_button())
+    if not STREAMING:
+        try:
+            if data["question_type"] == "question":
+                answer = await answer_question(question)
+            else:
+                answer = await answer_request(question)
+        except asyncio.TimeoutError:
+            answer = "Извините, помощник сейчас перегружен. Попробуйте спросить чуть позже"
+        await message.answer(text=answer.strip() or EMPTY_ANSWER, reply_markup=get_ai_button())
+        return
+
+    # Пользователь сразу видит заглушку, которая заполняется ответом по мере генерации
+    started = time.monotonic()
+    placeholder = await message.answer(text="Думаю над ответом...")
+    streamer = MessageStreamer(placeholder, started)
+    try:
+        async with streamer:
+            if data["question_type"] == "question":
+                answer = await answer_question(question, streamer.feed)
+            else:
+                # SQL режим отвечает таблицей целиком, без потоковой выдачи
+                answer = await answer_request(question)
+    except asyncio.TimeoutError:
+        answer = "Извините, помощник сейчас перегружен. Попробуйте спросить чуть позже"
+
+    await streamer.finish(answer, reply_markup=get_ai_button())
 
 
 
@@ -3,19 +3,20 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import CallbackQuery
 
-from DataBase.queries.orm import select_goods
+from DataBase.queries.orm import select_goods, count_goods
 from keyboards.goods_keyboard import (
     CategoryCallback,
     BrandsCallback,
     USBCallback,
-    category_dict,
-    brands_dict,
+    category_keyboard,
+    brands_keyboard,
     usb_type_button,
     select_goods_button,
     price_button
 )
-from text import goods_translate_dict, category_translate_dict, goods_text
+from text import goods_translate_dict, category_translate_dict
 from keyboards.keyboard import CatalogCallback
+from services.goods_album import send_goods
 
 
 class USBType(StatesGroup):
@@ -30,28 +31,14 @@ class GoodsData(StatesGroup):
 
 
 class GoodsSendData(StatesGroup):
-    """Хранит данные отправляемых данных"""
-    generator_goods = State()
+    """Хранит курсор отправляемых товаров"""
+    goods_filter = State()
+    last_id = State()
     len = State()
 
 
-def generatorGoods(goods_ls: list):
-    """
-    Функция генератор для получения товара разделяя их
-    :param goods_ls: Список товаров
-    :return: Кортеж из списка товара и количества выведенных товаров
-    """
-    goods_return = []
-
-    for index, goods in enumerate(goods_ls):
-        goods_return.append(goods[0])
-
-        if index % 2 == 1:
-            yield goods_return, len(goods_ls)-index-1
-            goods_return.clear()
-
-    yield goods_return, 0
-
+# Количество товаров, отправляемых за одно нажатие
+PAGE_SIZE = 2
 
 router = Router()
 
@@ -62,10 +49,10 @@ async def show_goods(callback: CallbackQuery, state: FSMContext):
     Асинхронная функция для отправки товаров.
 
     :param callback:
-    :param state: Содержит генератор
+    :param state: Содержит фильтры и ID последнего отправленного товара
 
-    С помощью генератора мы отправляем пользователю
-    товар постепенно и когда пользователь нажимает
+    Из базы данных берется только следующая страница
+    после last_id, и когда пользователь нажимает
     на кнопку с колбэком next мы снова вызываем эту
     функцию.
     """
@@ -74,59 +61,90 @@ async def show_goods(callback: CallbackQuery, state: FSMContext):
     if callback.data == "next":
         await callback.message.edit_text("Далее")
 
-    for goods_list, remainder in goods_data["generator_goods"]:
-        for goods in goods_list:
-            await callback.message.answer_photo(
-                photo=goods.photo,
-                caption=goods_text.format(
-                    name=goods.name,
-                    price=goods.price,
-                    characteristics=goods.characteristics
-                )
-            )
-
-        if remainder != 0:
-            await callback.message.answer(
-                text="Осталось {}".format(remainder),
-                reply_markup=select_goods_button()
-            )
-            break
+    goods_filter = goods_data.get("goods_filter")
+    if goods_filter is None:
+        return
+
+    goods_list = await select_goods(**goods_filter, after_id=goods_data["last_id"], limit=PAGE_SIZE)
+
+    # Страница товаров уходит одним альбомом
+    await send_goods(callback.message, [goods_tuple[0] for goods_tuple in goods_list])
+
+    remainder = 0
+    if goods_list:
+        last_id = goods_list[-1][0].id
+        await state.update_data(last_id=last_id)
+        remainder = await count_goods(**goods_filter, after_id=last_id)
+
+    if remainder != 0:
+        await callback.message.answer(
+            text="Осталось {}".format(remainder),
+            reply_markup=select_goods_button()
+        )
     else:
         await callback.message.answer("Найдено {} результатов".format(goods_data["len"]), reply_markup=None)
 
 
-async def get_goods(callback: CallbackQuery, state: FSMContext, brand="_", category="_", price="all", characteristics="_"):
+async def get_goods(callback: CallbackQuery, state: FSMContext, brand=None, category=None, price="all", characteristics=None):
     """
     Асинхронная функция для получения товаров.
 
     Args:
         callback: Объект CallbackQuery.
         state: Объект FSMContext для управления состоянием.
-        brand: Параметр для фильтрации по бренду (по умолчанию "_").
-        category: Параметр для фильтрации по категории (по умолчанию "_").
+        brand: Параметр для фильтрации по бренду (по умолчанию любой).
+        category: Параметр для фильтрации по категории (по умолчанию любая).
         price: Параметр для фильтрации по ценовой категории (по умолчанию "all").
-        characteristics: Параметр для фильтрации по характеристикам (по умолчанию "_").
+        characteristics: Параметр для фильтрации по характеристикам (по умолчанию любые).
 
     Описание:
-        1. Вызывает функцию select_goods для получения товаров с заданными параметрами.
-        2. Обновляем данные в состоянии: сохраняем "generator_goods" и количество товаров.
-        3. Вызывает функцию show_goods для отображения товаров.
+        1. Сохраняем в состоянии фильтры, начальный курсор "last_id" и количество товаров.
+        2. Вызывает функцию show_goods для отображения первой страницы.
     """
-    goods = await select_goods(brand=brand, category=category, price=price, characteristic=characteristics)
+    goods_filter = {"brand": brand, "category": category, "price": price, "characteristic": characteristics}
 
-    await state.update_data(generator_goods=generatorGoods(goods))
-    await state.update_data(len=len(goods))
+    await state.update_data(
+        goods_filter=goods_filter,
+        last_id=0,
+        len=await count_goods(**goods_filter)
+    )
 
-    # Мы вызываем эту функцию для запуская генератора
+    # Отправляем первую страницу
     await show_goods(callback, state)
 
 
-@router.callback_query(CatalogCallback.filter())
-async def show_category(callback: CallbackQuery, callback_data: CatalogCallback):
+async def show_brands(callback: CallbackQuery, category: str, title: str):
+    """
+    Отправляет кнопки брендов категории с количеством товаров.
+
+    Количество и цены берутся из goods_stats, поэтому
+    бренды без товаров не показываются, а если товаров
+    в категории нет совсем, то и выбирать нечего.
+    Клавиатура берется из keyboard_cache уже сериализованной.
+    """
+    keyboard = await brands_keyboard(category)
+    if keyboard is None:
+        await callback.message.answer(f"{title}\nТоваров в этой категории пока нет")
+        return
+
+    min_price, max_price, markup = keyboard
     await callback.message.answer(
-        text=category_translate_dict[callback_data.catalog],
-        reply_markup=category_dict[callback_data.catalog]
+        text=f"{title}\nЦены: от {min_price} до {max_price}",
+        reply_markup=markup
     )
+
+
+@router.callback_query(CatalogCallback.filter())
+async def show_category(callback: CallbackQuery, callback_data: CatalogCallback):
+    if callback_data.catalog == "tv":
+        # У телевизоров нет подкатегорий, сразу выбор бренда
+        await show_brands(callback, "tv", category_translate_dict["tv"])
+    else:
+        markup = await category_keyboard(callback_data.catalog)
+        if markup is None:
+            await callback.message.answer(f"{category_translate_dict[callback_data.catalog]}\nТоваров в этом разделе пока нет")
+        else:
+            await callback.message.answer(text=category_translate_dict[callback_data.catalog], reply_markup=markup)
     await callback.answer()
 
 
@@ -163,10 +181,7 @@ async def get_price(callback: CallbackQuery, state: FSMContext):
             reply_markup=usb_type_button()
         )
     else:
-        await callback.message.answer(
-            text=goods_translate_dict[data["category"]],
-            reply_markup=brands_dict[data["category"]]
-        )
+        await show_brands(callback, data["category"], goods_translate_dict[data["category"]])
     await state.set_state(None)
     await callback.answer()
 
@@ -178,7 +193,7 @@ async def show_usb_brands(callback: CallbackQuery, callback_data: USBCallback, s
     и предлагается выбрать бренд.
     """
     await state.update_data(types=callback_data.types)
-    await callback.message.answer(text="Зарядки", reply_markup=brands_dict["charger"])
+    await show_brands(callback, "charger", "Зарядки")
     await callback.answer()
 
 
@@ -222,19 +237,10 @@ async def show_category_goods(callback: CallbackQuery, state: FSMContext):
 
     Описание:
         1. Получаем данные из состояния.
-        2. Выбираем товары для указанной категории и ценовой категории.
-        3. Обновляем данные в состоянии: сохраняем "generator_goods" и "len" его длину.
-        4. Вызываем функцию для отображения товаров.
-        5. Запускаем генератор
+        2. Вызываем get_goods для указанной категории и ценовой категории.
     """
     data = await state.get_data()
-    goods_list = await select_goods(category=callback.data.split("_")[1], price=data["price"])
-
-    await state.update_data(generator_goods=generatorGoods(goods_list))
-    await state.update_data(len=len(goods_list))
 
     # Начинаем отправлять товар
-    await show_goods(callback, state)
+    await get_goods(callback, state, category=callback.data.split("_", 1)[1], price=data["price"])
     await callback.answer()
-
-
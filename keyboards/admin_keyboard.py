@@ -10,6 +10,10 @@ from aiogram.utils.keyboard import (
 )
 from typing import List
 
+from DataBase.queries.orm import select_goods_stats
+from keyboards.goods_keyboard import BRANDS, CATALOG_CATEGORIES
+from keyboards.keyboard_cache import PreparedReplyMarkup, keyboard_cache, prepare, prepared
+
 
 class EditCatalogCallback(CallbackData, prefix="edit_catalog"):
     catalog: str
@@ -24,6 +28,17 @@ class DeleteGoodsCallback(CallbackData, prefix="delete"):
     goods_id: int
 
 
+class BulkDeleteCallback(CallbackData, prefix="bulk_delete"):
+    # toggle - отметить товар, page - другая страница, all - отметить все, delete, cancel
+    action: str
+    goods_id: int = 0
+    page: int = 0
+
+
+# Количество товаров на странице списка удаления
+BULK_PAGE_SIZE = 10
+
+
 def factory_button_category(categories: List[str], category_callback: List[str]) -> InlineKeyboardMarkup:
     """
     Функция для создания инлайн кнопки
@@ -64,6 +79,7 @@ def factory_button_brands(brand_names: List[str]) -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
 
 
+@prepared
 def operating_mode_button() -> InlineKeyboardMarkup:
     """
     Функция для создания инлайн кнопки
@@ -74,30 +90,84 @@ def operating_mode_button() -> InlineKeyboardMarkup:
     button = [
         [InlineKeyboardButton(text="Добавить новый продукт", callback_data="add_goods")],
         [InlineKeyboardButton(text="Удалить старый продукт", callback_data="delete_goods")],
+        [InlineKeyboardButton(text="Удалить несколько продуктов", callback_data="bulk_delete_goods")],
     ]
 
     return InlineKeyboardMarkup(inline_keyboard=button)
 
 
-def delete_goods_button(post_id: int, goods_id: int) -> InlineKeyboardMarkup:
+def delete_goods_button(post_id: int, goods_list: list) -> InlineKeyboardMarkup:
     """
-    Функция для создания инлайн кнопки
-    который хранит информацию товара и поста
+    Функция для создания инлайн кнопок удаления
+    для альбома товаров, по кнопке на каждый товар
 
     :param post_id: ID - самого основного поста
-    :param goods_id: ID - определенного товара в БД
+    :param goods_list: Товары альбома в порядке отправки
     """
-    button = [
-        [
+    builder = InlineKeyboardBuilder()
+
+    for index, goods in enumerate(goods_list, start=1):
+        builder.add(InlineKeyboardButton(
+            text=f"❌ {index}. {goods.name}",
+            callback_data=DeleteGoodsCallback(post_id=post_id, goods_id=goods.id).pack()
+        ))
+
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def bulk_delete_button(goods_list: list, selected: set, page: int, total: int) -> InlineKeyboardMarkup:
+    """
+    Функция для создания страницы списка удаления
+    с отметками выбранных товаров
+
+    :param goods_list: Товары этой страницы в виде [id, name, price]
+    :param selected: ID отмеченных товаров
+    :param page: Номер страницы с нуля
+    :param total: Количество товаров во всем списке
+    """
+    builder = InlineKeyboardBuilder()
+    pages = max(1, -(-total // BULK_PAGE_SIZE))
+
+    for goods_id, name, price in goods_list:
+        mark = "✅" if goods_id in selected else "⬜"
+        builder.row(InlineKeyboardButton(
+            text=f"{mark} {name[:40]} - {price}",
+            callback_data=BulkDeleteCallback(action="toggle", goods_id=goods_id, page=page).pack()
+        ))
+
+    if pages > 1:
+        builder.row(
+            InlineKeyboardButton(
+                text="⬅️",
+                callback_data=BulkDeleteCallback(action="page", page=(page - 1) % pages).pack()
+            ),
+            InlineKeyboardButton(
+                text=f"{page + 1}/{pages}",
+                callback_data=BulkDeleteCallback(action="page", page=page).pack()
+            ),
             InlineKeyboardButton(
-                text="Удалить",
-                callback_data=DeleteGoodsCallback(post_id=post_id, goods_id=goods_id).pack()
+                text="➡️",
+                callback_data=BulkDeleteCallback(action="page", page=(page + 1) % pages).pack()
             )
-        ]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=button)
+        )
+
+    all_selected = len(selected) == total
+    builder.row(
+        InlineKeyboardButton(
+            text="Снять все" if all_selected else "Выбрать все",
+            callback_data=BulkDeleteCallback(action="all", page=page).pack()
+        ),
+        InlineKeyboardButton(text="Отмена", callback_data=BulkDeleteCallback(action="cancel").pack())
+    )
+    builder.row(InlineKeyboardButton(
+        text=f"🗑 Удалить выбранные ({len(selected)})",
+        callback_data=BulkDeleteCallback(action="delete").pack()
+    ))
+    return builder.as_markup()
 
 
+@prepared
 def catalog_button():
     """
     Функция для создания кнопки для каталогов
@@ -143,47 +213,26 @@ def catalog_button():
 
 # Создаем словарь, который будет содержать категории товаров и соответствующие кнопки
 category_button_dict = {
-    "phone_gadgets": factory_button_category(
-        categories=["📱 Смартфоны", "⌚ Смарт часы", "🔌 Адаптеры", "📲 Чехлы"],
-        category_callback=["phone", "watch", "charger", "case"]
-    ),
-    "appliances": factory_button_category(
-        categories=["🫖 Электрочайник", "🎁 Микроволновка", "🧹 Пылесос", "🎛 Стиральная машина"],
-        category_callback=["kettle", "microwave", "vacuum", "washing"]
-    ),
-    "periphery": factory_button_category(
-        categories=["📢 Портативные колонки", "📹 Видеокамеры"],
-        category_callback=["column", "camera"]
-    ),
-    "computer": factory_button_category(
-        categories=["💻 Ноутбуки", "🖥 Настольные компьютеры"],
-        category_callback=["laptop", "computer"]
-    ),
-    "tv": factory_button_brands(
-        brand_names=["LG", "Samsung", "Xiaomi", "Yasin"]
-    ),
-    "tools": factory_button_category(
-        categories=["🔧 Наборы инструментов", "⚒ Шуруповерты", "⚒ Дрели"],
-        category_callback=["set_tools", "screwdrivers", "drills"]
-    )
+    catalog: prepare(factory_button_category(
+        categories=[title for title, _ in categories],
+        category_callback=[category for _, category in categories]
+    ))
+    for catalog, categories in CATALOG_CATEGORIES.items()
 }
 
-# Создаем словарь, который будет содержать категории товаров и соответствующие бренды кнопки
-brands = {
-    "phone": factory_button_brands(brand_names=["Apple", "Samsung", "Xiaomi", "Huawei"]),
-    "watch": factory_button_brands(brand_names=["Apple", "Samsung", "Xiaomi", "Huawei"]),
-    "charger": factory_button_brands(brand_names=["Apple", "Samsung", "Xiaomi", "Huawei"]),
-    "case": factory_button_brands(brand_names=["Apple", "Samsung", "Xiaomi", "Huawei"]),
-    "kettle": factory_button_brands(brand_names=["Tefal", "Bosch", "Philips", "Braun"]),
-    "microwave": factory_button_brands(brand_names=["ARG", "Hansa", "LG", "Magna"]),
-    "vacuum": factory_button_brands(brand_names=["LG", "Samsung", "Xiaomi", "Philips"]),
-    "washing": factory_button_brands(brand_names=["LG", "Samsung", "Beko", "Haier"]),
-    "column": factory_button_brands(brand_names=["JBL", "Sony", "Vipe", "Xiaomi"]),
-    "camera": factory_button_brands(brand_names=["Sony", "Canon", "Panasonic", "Fujifilm"]),
-    "computer": factory_button_brands(brand_names=["Ucomp", "ITBRO", "Cassian", "Wintek"]),
-    "laptop": factory_button_brands(brand_names=["Acer", "Apple", "ASUS", "HP"]),
-    "tv": factory_button_brands(brand_names=["LG", "Samsung", "Xiaomi", "Yasin"]),
-    "set_tools": factory_button_brands(brand_names=["Force", "ROCKFORCE"]),
-    "screwdrivers": factory_button_brands(brand_names=["Bosch", "CROWN", "ALTECO"]),
-    "drills": factory_button_brands(brand_names=["Bosch", "CROWN", "ALTECO"])
-}
+
+async def brands_keyboard(category: str) -> PreparedReplyMarkup:
+    """
+    Кнопки брендов категории для админа
+
+    Все бренды из BRANDS, даже без товаров, чтобы было куда
+    добавлять, и бренды, которые есть только в базе.
+    Хранятся в keyboard_cache до изменения товаров.
+    """
+    async def build():
+        brand_names = list(BRANDS.get(category, []))
+        known = {brand.lower() for brand in brand_names}
+        brand_names += [row.title for row in await select_goods_stats(category=category) if row.brand not in known]
+        return prepare(factory_button_brands(brand_names=brand_names))
+
+    return await keyboard_cache.get(("admin_brands", category), build)
@@ -1,7 +1,11 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.filters.callback_data import CallbackData
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from DataBase.queries.orm import select_goods_stats
+from keyboards.keyboard_cache import PreparedInlineMarkup, keyboard_cache, prepare, prepared
 
 
 class CategoryCallback(CallbackData, prefix="category"):
@@ -31,16 +35,26 @@ class USBCallback(CallbackData, prefix="usb"):
     types: str
 
 
-def factory_category_button(category: List[str], category_callback: List[str]) -> InlineKeyboardMarkup:
+def factory_category_button(
+        category: List[str],
+        category_callback: List[str],
+        counts: Optional[dict] = None
+) -> InlineKeyboardMarkup:
     """
     Функция для создания инлайн кнопки категорий товаров
 
     :param category: список всех категорий
     :param category_callback: список всех именований для кнопки
+    :param counts: Количество товаров по категориям,
+                   если задано, то категории без товаров не показываются
     """
     keyboards = InlineKeyboardBuilder()
 
     for goods, goods_callback in zip(category, category_callback):
+        if counts is not None:
+            if not counts.get(goods_callback):
+                continue
+            goods = f"{goods} ({counts[goods_callback]})"
         keyboards.add(InlineKeyboardButton(
             text=goods,
             callback_data=CategoryCallback(category=goods_callback).pack())
@@ -50,25 +64,33 @@ def factory_category_button(category: List[str], category_callback: List[str]) -
     return keyboards.as_markup()
 
 
-def factory_brands_button(brands: List[str], category: str):
+def factory_brands_button(brands: List[str], category: str, counts: Optional[dict] = None):
     """
     Функция для создания инлайн кнопки под выбор
     брендов в категорий
 
     :param brands: Список всех брендов
     :param category:
+    :param counts: Количество товаров по бренду в нижнем регистре,
+                   если задано, то бренды без товаров не показываются
     """
     keyboards = InlineKeyboardBuilder()
 
     for brand in brands:
+        text = brand
+        if counts is not None:
+            if not counts.get(brand.lower()):
+                continue
+            text = f"{brand} ({counts[brand.lower()]})"
         keyboards.add(
-            InlineKeyboardButton(text=brand, callback_data=BrandsCallback(brand=brand.lower(), category=category).pack())
+            InlineKeyboardButton(text=text, callback_data=BrandsCallback(brand=brand.lower(), category=category).pack())
         )
     keyboards.add(InlineKeyboardButton(text="Показать", callback_data=f"show_{category.lower()}"))
     keyboards.adjust(2)
     return keyboards.as_markup()
 
 
+@prepared
 def usb_type_button():
     button = [
         [
@@ -91,6 +113,7 @@ def usb_type_button():
     return InlineKeyboardMarkup(inline_keyboard=button)
 
 
+@prepared
 def select_goods_button():
     kb = [
         [
@@ -102,6 +125,7 @@ def select_goods_button():
     return keyboards
 
 
+@prepared
 def price_button() -> InlineKeyboardMarkup:
     """
     Функция для создания инлайн кнопки под
@@ -121,49 +145,103 @@ def price_button() -> InlineKeyboardMarkup:
     return keyboards
 
 
-# Создаем словарь, который будет содержать категории товаров и соответствующие кнопки
-category_dict = {
-    "phone_gadgets": factory_category_button(
-        category=["📱 Смартфоны", "⌚ Смарт часы", "🔌 Адаптеры", "📲 Чехлы"],
-        category_callback=["phone", "watch", "charger", "case"]
-        ),
-    "appliances": factory_category_button(
-        category=["🫖 Электрочайник", "🎁 Микроволновка",  "🧹 Пылесос", "🎛 Стиральная машина"],
-        category_callback=["kettle", "microwave", "vacuum", "washing"]
-        ),
-    "periphery": factory_category_button(
-        category=["📢 Портативные колонки", "📹 Видеокамеры"],
-        category_callback=["column", "camera"]
-        ),
-    "computer": factory_category_button(
-        category=["💻 Ноутбуки", "🖥 Настольные компьютеры"],
-        category_callback=["laptop", "computer"]
-    ),
-    "tv": factory_brands_button(
-        brands=["LG", "Samsung", "Xiaomi", "Yasin"],
-        category="tv"
-    ),
-    "tools": factory_category_button(
-        category=["🔧 Наборы инструментов", "⚒ Шуруповерты", "⚒ Дрели"],
-        category_callback=["set_tools", "screwdrivers", "drills"]
-    )
+# Бренды категорий в порядке кнопок
+BRANDS = {
+    "phone": ["Apple", "Samsung", "Xiaomi", "Huawei"],
+    "watch": ["Apple", "Samsung", "Xiaomi", "Huawei"],
+    "charger": ["Apple", "Samsung", "Xiaomi", "Huawei"],
+    "case": ["Apple", "Samsung", "Xiaomi", "Huawei"],
+    "kettle": ["Tefal", "Bosch", "Philips", "Braun"],
+    "microwave": ["ARG", "Hansa", "LG", "Magna"],
+    "vacuum": ["LG", "Samsung", "Xiaomi", "Philips"],
+    "washing": ["LG", "Samsung", "Beko", "Haier"],
+    "column": ["JBL", "Sony", "Vipe", "Xiaomi"],
+    "camera": ["Sony", "Canon", "Panasonic", "Fujifilm"],
+    "computer": ["Ucomp", "ITBRO", "Cassian", "Wintek"],
+    "laptop": ["Acer", "Apple", "ASUS", "HP"],
+    "tv": ["LG", "Samsung", "Xiaomi", "Yasin"],
+    "set_tools": ["Force", "ROCKFORCE"],
+    "screwdrivers": ["Bosch", "CROWN", "ALTECO"],
+    "drills": ["Bosch", "CROWN", "ALTECO"]
+}
+
+# Категории разделов каталога в порядке кнопок, у телевизоров подкатегорий нет
+CATALOG_CATEGORIES = {
+    "phone_gadgets": [("📱 Смартфоны", "phone"), ("⌚ Смарт часы", "watch"), ("🔌 Адаптеры", "charger"), ("📲 Чехлы", "case")],
+    "appliances": [
+        ("🫖 Электрочайник", "kettle"), ("🎁 Микроволновка", "microwave"),
+        ("🧹 Пылесос", "vacuum"), ("🎛 Стиральная машина", "washing")
+    ],
+    "periphery": [("📢 Портативные колонки", "column"), ("📹 Видеокамеры", "camera")],
+    "computer": [("💻 Ноутбуки", "laptop"), ("🖥 Настольные компьютеры", "computer")],
+    "tools": [("🔧 Наборы инструментов", "set_tools"), ("⚒ Шуруповерты", "screwdrivers"), ("⚒ Дрели", "drills")]
 }
 
-# Создаем словарь, который будет содержать категории товаров и соответствующие бренды инлайн кнопки
-brands_dict = {
-    "phone": factory_brands_button(brands=["Apple", "Samsung", "Xiaomi", "Huawei"], category="phone"),
-    "watch": factory_brands_button(brands=["Apple", "Samsung", "Xiaomi", "Huawei"], category="watch"),
-    "charger": factory_brands_button(brands=["Apple", "Samsung", "Xiaomi", "Huawei"], category="charger"),
-    "case": factory_brands_button(brands=["Apple", "Samsung", "Xiaomi", "Huawei"], category="case"),
-    "kettle": factory_brands_button(brands=["Tefal", "Bosch", "Philips", "Braun"], category="kettle"),
-    "microwave": factory_brands_button(brands=["ARG", "Hansa", "LG", "Magna"], category="microwave"),
-    "vacuum": factory_brands_button(brands=["LG", "Samsung", "Xiaomi", "Philips"], category="vacuum"),
-    "washing": factory_brands_button(brands=["LG", "Samsung", "Beko", "Haier"], category="washing"),
-    "column": factory_brands_button(brands=["JBL", "Sony", "Vipe", "Xiaomi"], category="column"),
-    "camera": factory_brands_button(brands=["Sony", "Canon", "Panasonic", "Fujifilm"], category="camera"),
-    "computer": factory_brands_button(brands=["Ucomp", "ITBRO", "Cassian", "Wintek"], category="computer"),
-    "laptop": factory_brands_button(brands=["Acer", "Apple", "ASUS", "HP"], category="laptop"),
-    "set_tools": factory_brands_button(brands=["Force", "ROCKFORCE"], category="set_tools"),
-    "screwdrivers": factory_brands_button(brands=["Bosch", "CROWN", "ALTECO"], category="screwdrivers"),
-    "drills": factory_brands_button(brands=["Bosch", "CROWN", "ALTECO"], category="drills")
-    }
+
+def brand_fits_callback(brand: str, category: str) -> bool:
+    """
+    Можно ли сделать кнопку бренда: в callback_data нельзя
+    использовать ":" и она не может быть длиннее 64 байт
+    """
+    try:
+        BrandsCallback(brand=brand.lower(), category=category).pack()
+    except ValueError:
+        return False
+    return True
+
+
+def brands_stats_button(category: str, stats: list) -> InlineKeyboardMarkup:
+    """
+    Кнопки брендов с количеством товаров, например "Apple (12)"
+
+    :param stats: строки goods_stats категории
+
+    Бренды без товаров скрываются, бренды, которые есть
+    только в базе (например после импорта), добавляются в конец.
+    """
+    counts = {row.brand: row.count for row in stats}
+    known = {brand.lower() for brand in BRANDS.get(category, [])}
+    brand_names = BRANDS.get(category, []) + [
+        row.title for row in stats if row.brand not in known and brand_fits_callback(row.brand, category)
+    ]
+    return factory_brands_button(brands=brand_names, category=category, counts=counts)
+
+
+async def category_keyboard(catalog: str) -> Optional[PreparedInlineMarkup]:
+    """
+    Кнопки категорий раздела с количеством товаров
+
+    Строятся по goods_stats и хранятся в keyboard_cache
+    до изменения товаров. None - в разделе нет товаров.
+    """
+    async def build():
+        counts = Counter()
+        for row in await select_goods_stats():
+            counts[row.category_id] += row.count
+
+        titles, callbacks = zip(*CATALOG_CATEGORIES[catalog])
+        if not any(counts.get(category) for category in callbacks):
+            return None
+        return prepare(factory_category_button(list(titles), list(callbacks), counts=counts))
+
+    return await keyboard_cache.get(("category", catalog), build)
+
+
+async def brands_keyboard(category: str) -> Optional[Tuple[int, int, PreparedInlineMarkup]]:
+    """
+    Кнопки брендов категории и диапазон цен (мин, макс, кнопки)
+
+    Строятся по goods_stats и хранятся в keyboard_cache
+    до изменения товаров. None - в категории нет товаров.
+    """
+    async def build():
+        stats = await select_goods_stats(category=category)
+        if not stats:
+            return None
+        return (
+            min(row.min_price for row in stats),
+            max(row.max_price for row in stats),
+            prepare(brands_stats_button(category, stats))
+        )
+
+    return await keyboard_cache.get(("brands", category), build)
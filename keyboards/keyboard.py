@@ -1,11 +1,14 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.filters.callback_data import CallbackData
 
+from keyboards.keyboard_cache import prepared
+
 
 class CatalogCallback(CallbackData, prefix="catalog"):
     catalog: str
 
 
+@prepared
 def catalog_button() -> InlineKeyboardMarkup:
     """
         Функция для создания кнопки для каталогов
@@ -0,0 +1,131 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
+from pydantic import PrivateAttr
+
+from DataBase.queries.cache import goods_cache
+
+from functools import cache, wraps
+from typing import Any, Awaitable, Callable, Hashable, Union
+import json
+import os
+import time
+
+
+class PreparedInlineMarkup(InlineKeyboardMarkup):
+    """
+    Инлайн клавиатура вместе с готовым JSON.
+
+    Такую клавиатуру нельзя менять после prepare(),
+    иначе в Telegram уйдет старый JSON.
+    """
+    _serialized: str = PrivateAttr(default="")
+
+    @property
+    def serialized(self) -> str:
+        return self._serialized
+
+
+class PreparedReplyMarkup(ReplyKeyboardMarkup):
+    """Обычная клавиатура вместе с готовым JSON"""
+    _serialized: str = PrivateAttr(default="")
+
+    @property
+    def serialized(self) -> str:
+        return self._serialized
+
+
+PreparedMarkup = Union[PreparedInlineMarkup, PreparedReplyMarkup]
+
+
+def prepare(markup: Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]) -> PreparedMarkup:
+    """
+    Сериализует клавиатуру один раз.
+
+    JSON такой же, какой собрал бы aiogram: без полей со значением None.
+    """
+    prepared_class = PreparedInlineMarkup if isinstance(markup, InlineKeyboardMarkup) else PreparedReplyMarkup
+    prepared = prepared_class(**dict(markup))
+    prepared._serialized = json.dumps(markup.model_dump(exclude_none=True))
+    return prepared
+
+
+def prepared(func: Callable[[], Any]) -> Callable[[], PreparedMarkup]:
+    # Для клавиатур без параметров: строится и сериализуется при первом вызове
+    @wraps(func)
+    @cache
+    def wrapper():
+        return prepare(func())
+
+    return wrapper
+
+
+class KeyboardCache:
+    """
+    Кэш клавиатур, которые строятся из данных о товарах.
+
+    Запись хранит версию каталога, для которой она построена.
+    Версия - generation кэша запросов, она меняется при каждом
+    добавлении и удалении товаров, поэтому клавиатура
+    перестраивается только после изменения каталога
+    (или через ttl, если товары изменил другой процесс).
+    """
+
+    def __init__(self, version: Callable[[], int], ttl: float = 300):
+        self.version = version
+        self.ttl = ttl
+        self._data: dict = {}
+        self.hits = 0
+        self.builds = 0
+
+    async def get(self, key: Hashable, build: Callable[[], Awaitable[Any]]) -> Any:
+        version = self.version()
+        item = self._data.get(key)
+        if item is not None and item[0] == version and item[1] > time.monotonic():
+            self.hits += 1
+            return item[2]
+
+        self.builds += 1
+        value = await build()
+        # Пока строилась клавиатура, товары могли измениться
+        if version == self.version():
+            self._data[key] = (version, time.monotonic() + self.ttl, value)
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.builds
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "builds": self.builds,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class PreparedMarkupMiddleware(BaseRequestMiddleware):
+    """
+    Подставляет готовый JSON клавиатуры в запрос.
+
+    aiogram сериализует reply_markup при каждой отправке,
+    а строку передает как есть, поэтому в копию метода
+    кладется уже сериализованная клавиатура.
+    """
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType[TelegramType],
+            bot: Bot,
+            method: TelegramMethod[TelegramType]
+    ):
+        markup = getattr(method, "reply_markup", None)
+        if isinstance(markup, (PreparedInlineMarkup, PreparedReplyMarkup)):
+            method = method.model_copy(update={"reply_markup": markup.serialized})
+        return await make_request(bot, method)
+
+
+keyboard_cache = KeyboardCache(
+    version=lambda: goods_cache.generation,
+    ttl=float(os.getenv("KEYBOARD_TTL", os.getenv("CACHE_TTL", 300)))
+)
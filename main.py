@@ -1,32 +1,129 @@
 from aiogram import Bot, Dispatcher
+from aiohttp import web
 from handlers import handlers, admin
 from handlers import goods_handler, assistant_handler
+from keyboards.keyboard_cache import PreparedMarkupMiddleware
 from DataBase.queries.orm import create_table
+from DataBase.database import engine
+from services.callback_dispatch import CALLBACK_INDEX, install_callback_index
+from services.index_service import index_service
+from services.outbound import outbound_scheduler
+from services.posts_purge import posts_purger
+from services.sql_assistant import sql_assistant
+from services.webhook import create_webhook_app
 
 import os
+import sys
 import asyncio
 import logging
 
+# polling - бот сам забирает апдейты, webhook - Telegram присылает их на WEBHOOK_URL
+BOT_MODE = os.getenv("BOT_MODE", "polling")
 
-async def main():
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", 8080))
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", 50))
+
+
+async def on_startup(bot: Bot):
+    await create_table()
+    # Индекс базы знаний и схема таблиц для ИИ загружаются один раз, не блокируя цикл событий
+    try:
+        await asyncio.to_thread(index_service.load)
+    except Exception:
+        # Без OpenAI каталог и админка работают, индекс загрузится при первом вопросе
+        logging.exception("Индекс ИИ не загружен при запуске")
+    try:
+        await asyncio.to_thread(sql_assistant.load)
+    except Exception:
+        logging.exception("Схема таблиц для ИИ не загружена при запуске")
+    posts_purger.start()
+    if BOT_MODE == "webhook":
+        await bot.set_webhook(
+            url=f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            # Telegram принимает от 1 до 100 соединений
+            max_connections=min(UPDATE_CONCURRENCY, 100),
+            drop_pending_updates=True
+        )
+    else:
+        await bot.delete_webhook(drop_pending_updates=True)
+
+
+async def on_shutdown():
+    await posts_purger.stop()
+    await engine.dispose()
+
+
+def create_bot() -> Bot:
+    bot = Bot(token=os.getenv("TOKEN"))
+    # Все исходящие запросы проходят через планировщик с лимитами Telegram
+    bot.session.middleware(outbound_scheduler)
+    # Клавиатуры из кэша уходят уже сериализованными
+    bot.session.middleware(PreparedMarkupMiddleware())
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
     """
-    Самый основной функция
-    Соединяет все роутеры к диспетчеру
-    :return:
+    Соединяет все роутеры к диспетчеру.
+    Один и тот же диспетчер используется в режимах polling и webhook
     """
-    bot = Bot(token=os.getenv("TOKEN"))
     dp = Dispatcher()
     dp.include_router(admin.router)
     dp.include_router(assistant_handler.router)
     dp.include_router(handlers.router)
     dp.include_router(goods_handler.router)
-    await create_table()
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    if CALLBACK_INDEX:
+        # Колбэки сразу попадают к хэндлеру своего префикса
+        install_callback_index(dp)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    return dp
+
+
+async def main():
+    """
+    Самый основной функция
+    Запускает бота в режиме polling
+    :return:
+    """
+    await create_dispatcher().start_polling(create_bot())
+
+
+def main_webhook():
+    # Запускает aiohttp сервер, на который Telegram присылает апдейты
+    if not WEBHOOK_URL:
+        raise SystemExit("BOT_MODE=webhook требует WEBHOOK_URL, например https://example.com")
+    app = create_webhook_app(
+        create_dispatcher(),
+        create_bot(),
+        path=WEBHOOK_PATH,
+        concurrency=UPDATE_CONCURRENCY,
+        secret_token=WEBHOOK_SECRET
+    )
+    web.run_app(app, host=WEBAPP_HOST, port=WEBAPP_PORT)
+
+
+def set_event_loop_policy():
+    # uvloop быстрее стандартного цикла событий, но есть только на Linux и macOS
+    try:
+        import uvloop
+    except ImportError:
+        # aiomysql на Windows не работает с ProactorEventLoop
+        if sys.platform == "win32":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
-
+    set_event_loop_policy()
+    if BOT_MODE == "webhook":
+        main_webhook()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from DataBase.queries.cache import SingleFlight
+
+from typing import Callable, TypeVar
+import asyncio
+import logging
+import os
+import time
+
+T = TypeVar("T")
+
+
+class AIExecutor:
+    """
+    Выполняет синхронные запросы llama_index/OpenAI в отдельных потоках.
+
+    Одновременно выполняются не больше concurrency запросов, остальные
+    ждут в очереди, не блокируя цикл событий. Если ответ не пришел за
+    timeout секунд, вызывающий получает asyncio.TimeoutError. Поток
+    нельзя прервать, поэтому место в пуле освобождается, только когда
+    запрос к OpenAI действительно завершится.
+    """
+
+    def __init__(self, concurrency: int = 4, timeout: float = 60):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ai")
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        self.waiting = 0
+        self.running = 0
+        self.done = 0
+        self.timed_out = 0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+
+    def _release(self, _future):
+        self.running -= 1
+        self.done += 1
+        self._semaphore.release()
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        queued = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait = time.monotonic() - queued
+        self.max_wait = max(self.max_wait, wait)
+        self._total_wait += wait
+
+        self.running += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        future.add_done_callback(self._release)
+        try:
+            # shield: по таймауту отменяется только ожидание, а не учет потока
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logging.warning("Запрос к ИИ не уложился в %s с", self.timeout)
+            raise
+
+    def stats(self) -> dict:
+        started = self.running + self.done
+        return {
+            "queue": self.waiting,
+            "running": self.running,
+            "done": self.done,
+            "timed_out": self.timed_out,
+            "avg_wait": self._total_wait / started if started else 0.0,
+            "max_wait": self.max_wait
+        }
+
+
+ai_executor = AIExecutor(
+    concurrency=int(os.getenv("AI_CONCURRENCY", 4)),
+    timeout=float(os.getenv("AI_TIMEOUT", 60))
+)
+
+# Одинаковые вопросы, заданные одновременно, ждут один ответ LLM
+ai_flights = SingleFlight()
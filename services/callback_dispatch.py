@@ -0,0 +1,173 @@
+from aiogram import Dispatcher, Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.filters.callback_data import CallbackData, CallbackQueryFilter
+from aiogram.types import CallbackQuery
+from magic_filter.operations import ComparatorOperation, GetAttributeOperation
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+import operator
+import os
+
+# 0 - обычная проверка фильтров всех хэндлеров по порядку
+CALLBACK_INDEX = os.getenv("CALLBACK_INDEX", "1") == "1"
+
+SEPARATOR = ":"
+
+
+@dataclass
+class CallbackRoute:
+    """
+    Хэндлер callback_query с разобранным первым фильтром
+
+    callback_data - класс CallbackData.filter(), exact - значение
+    из F.data == "...", без них хэндлер проверяется для любого колбэка.
+    filters - остальные фильтры хэндлера (например состояние).
+    """
+    order: int
+    router: Router
+    handler: HandlerObject
+    filters: List[FilterObject]
+    callback_data: Optional[Type[CallbackData]] = None
+    rule: Any = None
+    exact: Optional[str] = None
+
+    @property
+    def key(self) -> Optional[str]:
+        if self.callback_data is not None:
+            return self.callback_data.__prefix__
+        if self.exact is not None:
+            return self.exact.split(SEPARATOR, 1)[0]
+        return None
+
+
+def exact_data(filter_object: FilterObject) -> Optional[str]:
+    # Значение из фильтра F.data == "...", иначе None
+    operations = getattr(filter_object.magic, "_operations", ())
+    if (
+            len(operations) == 2
+            and isinstance(operations[0], GetAttributeOperation) and operations[0].name == "data"
+            and isinstance(operations[1], ComparatorOperation) and operations[1].comparator is operator.eq
+            and isinstance(operations[1].right, str)
+    ):
+        return operations[1].right
+    return None
+
+
+def make_route(order: int, router: Router, handler: HandlerObject) -> CallbackRoute:
+    filters = list(handler.filters or [])
+    route = CallbackRoute(order=order, router=router, handler=handler, filters=filters[1:])
+    first = filters[0].callback if filters else None
+    if isinstance(first, CallbackQueryFilter):
+        route.callback_data, route.rule = first.callback_data, first.rule
+    elif filters and exact_data(filters[0]) is not None:
+        route.exact = exact_data(filters[0])
+    else:
+        route.filters = filters
+    return route
+
+
+class CallbackIndex:
+    """
+    Маршрутизация callback_query по префиксу колбэка.
+
+    Обычно aiogram проверяет фильтры всех хэндлеров всех роутеров
+    по порядку, и CallbackData.unpack повторяется для каждого
+    CallbackData.filter(). Здесь хэндлеры разложены по префиксу
+    ("catalog", "brand", "delete" ...) или точному значению
+    (F.data == "next"), поэтому проверяются только хэндлеры
+    с тем же префиксом и хэндлеры без такого фильтра
+    (например только по состоянию), в прежнем порядке.
+    Колбэк каждого класса CallbackData разбирается один раз.
+    """
+
+    def __init__(self, routes: List[CallbackRoute]):
+        fallback = [route for route in routes if route.key is None]
+        keyed: Dict[str, List[CallbackRoute]] = {}
+        for route in routes:
+            if route.key is not None:
+                keyed.setdefault(route.key, []).append(route)
+
+        self.fallback = fallback
+        # Хэндлеры без префикса проверяются вместе с остальными в порядке регистрации
+        self.routes = {
+            key: sorted(key_routes + fallback, key=lambda route: route.order)
+            for key, key_routes in keyed.items()
+        }
+        self.updates = 0
+        self.checked = 0
+
+    async def dispatch(self, callback: CallbackQuery, **kwargs: Any) -> Any:
+        self.updates += 1
+        data = callback.data or ""
+        parsed: Dict[type, Optional[CallbackData]] = {}
+
+        for route in self.routes.get(data.split(SEPARATOR, 1)[0], self.fallback):
+            self.checked += 1
+            handler_data = dict(kwargs, event_router=route.router)
+
+            if route.callback_data is not None:
+                if route.callback_data not in parsed:
+                    try:
+                        parsed[route.callback_data] = route.callback_data.unpack(data)
+                    except (TypeError, ValueError):
+                        parsed[route.callback_data] = None
+                callback_data = parsed[route.callback_data]
+                if callback_data is None or (route.rule is not None and not route.rule.resolve(callback_data)):
+                    continue
+                handler_data["callback_data"] = callback_data
+            elif route.exact is not None and data != route.exact:
+                continue
+
+            if not await self._check(route, callback, handler_data):
+                continue
+            handler_data["handler"] = route.handler
+            try:
+                return await route.handler.call(callback, **handler_data)
+            except SkipHandler:
+                continue
+
+        return UNHANDLED
+
+    @staticmethod
+    async def _check(route: CallbackRoute, callback: CallbackQuery, handler_data: dict) -> bool:
+        # То же, что HandlerObject.check для оставшихся фильтров
+        for event_filter in route.filters:
+            check = await event_filter.call(callback, **handler_data)
+            if not check:
+                return False
+            if isinstance(check, dict):
+                handler_data.update(check)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "prefixes": len(self.routes),
+            "fallback": len(self.fallback),
+            "updates": self.updates,
+            "checked_per_update": self.checked / self.updates if self.updates else 0.0
+        }
+
+
+def install_callback_index(dispatcher: Dispatcher) -> CallbackIndex:
+    """
+    Переносит хэндлеры callback_query всех роутеров в CallbackIndex,
+    который регистрируется единственным хэндлером диспетчера.
+
+    Вызывается после include_router. Общие фильтры и middleware
+    callback_query роутеров индекс не выполняет, поэтому с ними
+    установить его нельзя.
+    """
+    routes = []
+    for router in dispatcher.chain_tail:
+        observer = router.callback_query
+        if observer._handler.filters or list(observer.middleware) or list(observer.outer_middleware):
+            raise ValueError(f"У роутера {router} есть общие фильтры или middleware callback_query")
+        for handler in observer.handlers:
+            routes.append(make_route(len(routes), router, handler))
+        observer.handlers = []
+
+    index = CallbackIndex(routes)
+    dispatcher.callback_query.register(index.dispatch)
+    return index
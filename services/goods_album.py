@@ -0,0 +1,48 @@
+from aiogram.types import Message, InputMediaPhoto
+
+from services.outbound import bulk_sends
+from text import goods_text
+from typing import List
+import os
+
+# album - карточки товаров отправляются альбомами, photo - каждая отдельным сообщением
+GOODS_DELIVERY = os.getenv("GOODS_DELIVERY", "album")
+# Telegram принимает в альбоме от 2 до 10 фотографий
+ALBUM_SIZE = 10
+
+
+def goods_caption(goods) -> str:
+    return goods_text.format(
+        name=goods.name,
+        price=goods.price,
+        characteristics=goods.characteristics
+    )
+
+
+async def send_goods(message: Message, goods_list: list) -> List[Message]:
+    """
+    Асинхронная функция отправляет карточки товаров в чат сообщения
+
+    :param message: сообщение, в чат которого отправляем
+    :param goods_list: список товаров GoodsTableORM
+    :return: отправленные сообщения, по одному на каждый товар в том же порядке
+
+    В режиме album товары отправляются через send_media_group,
+    один запрос на каждые 10 товаров вместо запроса на каждый товар.
+    Фотографии идут по полосе BULK планировщика исходящих запросов.
+    """
+    sent = []
+
+    with bulk_sends():
+        for start in range(0, len(goods_list), ALBUM_SIZE):
+            chunk = goods_list[start:start + ALBUM_SIZE]
+
+            if GOODS_DELIVERY == "album" and len(chunk) > 1:
+                sent.extend(await message.answer_media_group(
+                    media=[InputMediaPhoto(media=goods.photo, caption=goods_caption(goods)) for goods in chunk]
+                ))
+            else:
+                for goods in chunk:
+                    sent.append(await message.answer_photo(photo=goods.photo, caption=goods_caption(goods)))
+
+    return sent
@@ -0,0 +1,131 @@
+from DataBase.queries.orm import insert_goods_many
+from keyboards.goods_keyboard import brand_fits_callback
+from text import goods_translate_dict
+
+from typing import Awaitable, BinaryIO, Callable, Iterator, Optional, Tuple
+import codecs
+import csv
+import json
+import os
+import time
+
+# Сколько товаров добавляется одной транзакцией
+IMPORT_CHUNK = int(os.getenv("IMPORT_CHUNK", 500))
+# Сколько ошибок показать админу в итоге импорта
+ERRORS_SHOWN = 10
+
+FIELDS = ("category_id", "brand", "name", "price", "characteristics", "photo")
+# Ограничения колонок таблицы goods
+LIMITS = {"brand": 50, "name": 100, "characteristics": 300, "photo": 100}
+
+
+def import_format(file_name: str) -> Optional[str]:
+    extension = os.path.splitext(file_name or "")[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl"}.get(extension)
+
+
+def read_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, object]]:
+    """
+    Читает строки файла по одной и возвращает (номер строки, строка)
+
+    CSV - с заголовком из названий полей FIELDS, через запятую или точку с запятой,
+    JSONL - один json объект на строку. Строка, которую не удалось
+    разобрать, возвращается как исключение ValueError.
+    """
+    lines = codecs.getreader("utf-8-sig")(file)
+    if file_format == "jsonl":
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as error:
+                yield number, ValueError(f"неверный json: {error.msg}")
+        return
+
+    header = next(lines, "")
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    reader = csv.DictReader(lines, fieldnames=next(csv.reader([header], delimiter=delimiter)), delimiter=delimiter)
+    for row in reader:
+        # Номер строки с учетом заголовка, как в редакторе таблиц
+        yield reader.line_num + 1, row
+
+
+def validate_goods(row: object) -> dict:
+    """
+    Проверяет строку файла и приводит ее к полям insert_goods
+
+    Поля те же, что спрашивает пошаговое добавление товара.
+    """
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("строка должна быть объектом с полями")
+
+    goods = {field: str(row.get(field) or "").strip() for field in FIELDS}
+    missing = [field for field in FIELDS if not goods[field]]
+    if missing:
+        raise ValueError(f"не заполнено: {', '.join(missing)}")
+
+    if goods["category_id"] not in goods_translate_dict:
+        raise ValueError(f"неизвестная категория {goods['category_id']}")
+    # Иначе для бренда не получится кнопка у покупателя
+    if not brand_fits_callback(goods["brand"], goods["category_id"]):
+        raise ValueError("бренд не может содержать \":\" и должен быть короче для кнопки")
+    try:
+        goods["price"] = int(goods["price"].replace(" ", ""))
+    except ValueError:
+        raise ValueError(f"цена должна быть целым числом, а не {goods['price']}") from None
+    if goods["price"] <= 0:
+        raise ValueError("цена должна быть больше нуля")
+
+    # name хранится вместе с брендом
+    lengths = dict(goods, name=f"{goods['brand']} {goods['name']}")
+    for field, limit in LIMITS.items():
+        if len(lengths[field]) > limit:
+            raise ValueError(f"{field} длиннее {limit} символов")
+    return goods
+
+
+async def import_goods(
+        file: BinaryIO,
+        file_format: str,
+        progress: Optional[Callable[[dict], Awaitable]] = None,
+        chunk_size: int = IMPORT_CHUNK
+) -> dict:
+    """
+    Импорт товаров из файла CSV или JSONL
+
+    :param progress: вызывается после каждой пачки с текущими счетчиками
+    :return: количество добавленных и пропущенных строк, ошибки и время
+
+    Файл читается построчно, неверные строки пропускаются,
+    остальные добавляются пачками по chunk_size
+    товаров, каждая пачка в своей транзакции.
+    """
+    started = time.perf_counter()
+    result = {"imported": 0, "skipped": 0, "errors": [], "time": 0.0}
+    chunk = []
+
+    async def flush():
+        await insert_goods_many(chunk)
+        result["imported"] += len(chunk)
+        chunk.clear()
+        if progress is not None:
+            await progress(result)
+
+    for number, row in read_rows(file, file_format):
+        try:
+            chunk.append(validate_goods(row))
+        except ValueError as error:
+            result["skipped"] += 1
+            if len(result["errors"]) < ERRORS_SHOWN:
+                result["errors"].append(f"строка {number}: {error}")
+            continue
+        if len(chunk) >= chunk_size:
+            await flush()
+
+    if chunk:
+        await flush()
+    result["time"] = time.perf_counter() - started
+    return result
@@ -0,0 +1,264 @@
+from llama_index import (
+    VectorStoreIndex,
+    SimpleDirectoryReader,
+    StorageContext,
+    load_index_from_storage,
+    ServiceContext
+)
+from llama_index.indices.query.schema import QueryBundle
+from llama_index.llms import OpenAI
+
+from services.mmap_vector_store import MmapVectorStore
+from services.semantic_cache import SemanticCache, answer_cache
+
+from pathlib import Path
+from typing import Callable, Optional
+import logging
+import os
+import threading
+import time
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# Пути от корня проекта, чтобы не зависеть от папки запуска бота
+DATA_DIR = Path(os.getenv("AI_DATA_DIR", ROOT_DIR / "data"))
+STORAGE_DIR = Path(os.getenv("AI_STORAGE_DIR", ROOT_DIR / "storage"))
+
+
+class IndexService:
+    """
+    Индекс базы знаний для режима "Вопрос о товаре".
+
+    Загружается один раз при запуске бота из STORAGE_DIR, если его там нет,
+    то строится из DATA_DIR и сохраняется. LLM, ServiceContext и движок
+    запросов создаются один раз и общие для всех пользователей.
+    Эмбеддинги хранятся в MmapVectorStore.
+    refresh() после изменения файлов DATA_DIR эмбеддит только новые
+    и измененные файлы, rebuild() строит индекс заново.
+    answer() сначала ищет похожий вопрос в кэше ответов answer_cache,
+    с on_text ответ отдается по частям через потоковый движок запросов.
+    """
+
+    def __init__(
+            self,
+            data_dir: Path = DATA_DIR,
+            persist_dir: Path = STORAGE_DIR,
+            service_context: Optional[ServiceContext] = None,
+            cache: SemanticCache = answer_cache
+    ):
+        self.data_dir = Path(data_dir)
+        self.persist_dir = Path(persist_dir)
+        self._service_context = service_context
+        self.cache = cache
+        self.index = None
+        self.query_engine = None
+        self.streaming_engine = None
+        # load, rebuild и refresh вызываются из разных потоков (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+        self.load_time = None
+        self.first_latency = None
+        self.queries = 0
+        self._steady_total = 0.0
+        self.streams = 0
+        self._ttfb_total = 0.0
+
+    @property
+    def service_context(self) -> ServiceContext:
+        if self._service_context is None:
+            llm = OpenAI(temperature=0, model="gpt-3.5-turbo", max_tokens=140)
+            self._service_context = ServiceContext.from_defaults(llm=llm)
+        return self._service_context
+
+    def _documents(self) -> list:
+        # ID документа - путь файла от DATA_DIR, по нему refresh() находит прежнюю версию
+        documents = SimpleDirectoryReader(str(self.data_dir), filename_as_id=True).load_data()
+        for document in documents:
+            document.id_ = Path(document.id_).relative_to(self.data_dir).as_posix()
+        return documents
+
+    def _build(self):
+        documents = self._documents()
+        storage_context = StorageContext.from_defaults(vector_store=MmapVectorStore())
+        index = VectorStoreIndex.from_documents(
+            documents, storage_context=storage_context, service_context=self.service_context
+        )
+        index.storage_context.persist(persist_dir=str(self.persist_dir))
+        return index
+
+    def _set_index(self, index):
+        # Движок заменяется одним присваиванием, текущие запросы дорабатывают со старым
+        self.index = index
+        self.query_engine = index.as_query_engine()
+        self.streaming_engine = index.as_query_engine(streaming=True)
+
+    def _is_persisted(self) -> bool:
+        return (self.persist_dir / "docstore.json").exists()
+
+    def _load_index(self):
+        storage_context = StorageContext.from_defaults(
+            persist_dir=str(self.persist_dir),
+            vector_store=MmapVectorStore.from_persist_dir(self.persist_dir)
+        )
+        return load_index_from_storage(storage_context, service_context=self.service_context)
+
+    def load(self):
+        # Индекс загружается один раз, даже если первые запросы пришли одновременно
+        if self.query_engine is not None:
+            return
+        with self._lock:
+            if self.query_engine is not None:
+                return
+            started = time.perf_counter()
+            self._set_index(self._load_index() if self._is_persisted() else self._build())
+
+            self.load_time = time.perf_counter() - started
+            logging.info("Индекс базы знаний загружен за %.2f с", self.load_time)
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        started = time.perf_counter()
+        self._set_index(self._build())
+        # Ответы по старым данным больше не верны
+        self.cache.clear()
+        logging.info("Индекс базы знаний перестроен за %.2f с", time.perf_counter() - started)
+
+    def refresh(self) -> dict:
+        """
+        Обновляет индекс по изменениям в DATA_DIR
+
+        Файлы сравниваются с сохраненными по хэшу содержимого:
+        эмбеддятся только новые и измененные, удаленные убираются
+        из docstore и хранилища векторов. Изменения применяются
+        к копии индекса, загруженной с диска, и подменяют текущий
+        только после сохранения.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> dict:
+        started = time.perf_counter()
+        if not self._is_persisted():
+            self._rebuild()
+            return {"rebuilt": True, "time": time.perf_counter() - started}
+
+        index = self._load_index()
+        known = set(index.ref_doc_info)
+        if not known and index.docstore.docs:
+            # Индекс собран до refresh(), без путей файлов в ID документов
+            self._rebuild()
+            return {"rebuilt": True, "time": time.perf_counter() - started}
+
+        documents = self._documents()
+        refreshed = index.refresh_ref_docs(documents)
+        removed = known - {document.id_ for document in documents}
+        for ref_doc_id in removed:
+            index.delete_ref_doc(ref_doc_id, delete_from_docstore=True)
+
+        added = sum(1 for document in documents if document.id_ not in known)
+        changed = sum(refreshed) - added
+        if changed or added or removed:
+            index.storage_context.persist(persist_dir=str(self.persist_dir))
+            self._set_index(index)
+            self.cache.clear()
+
+        result = {
+            "rebuilt": False,
+            "added": added,
+            "changed": changed,
+            "removed": len(removed),
+            "unchanged": len(documents) - sum(refreshed),
+            "time": time.perf_counter() - started
+        }
+        logging.info("Индекс базы знаний обновлен: %s", result)
+        return result
+
+    def _record(self, latency: float):
+        # Первый ответ отдельно: в нем прогрев соединений и кэшей
+        if self.first_latency is None:
+            self.first_latency = latency
+        else:
+            self._steady_total += latency
+        self.queries += 1
+        logging.info("Ответ ИИ за %.2f с", latency)
+
+    def query(self, question: str | QueryBundle) -> str:
+        if self.query_engine is None:
+            self.load()
+
+        started = time.perf_counter()
+        response = self.query_engine.query(question)
+        self._record(time.perf_counter() - started)
+
+        return response.response
+
+    def stream(self, question: str | QueryBundle, on_text: Callable[[str], None]) -> str:
+        """
+        Запрос к LLM с выдачей ответа по частям
+
+        :param on_text: вызывается в этом же потоке для каждого нового куска текста
+        :return: полный текст ответа
+        """
+        if self.streaming_engine is None:
+            self.load()
+
+        started = time.perf_counter()
+        response = self.streaming_engine.query(question)
+        parts = []
+        for delta in response.response_gen:
+            if not parts:
+                self._ttfb_total += time.perf_counter() - started
+                self.streams += 1
+            parts.append(delta)
+            on_text(delta)
+        self._record(time.perf_counter() - started)
+
+        return "".join(parts)
+
+    def answer(
+            self,
+            question: str,
+            prompt: Optional[str] = None,
+            on_text: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Ответ на вопрос пользователя с учетом кэша
+
+        :param question: текст пользователя, по нему ищется похожий вопрос в кэше
+        :param prompt: полный запрос к LLM, по умолчанию сам вопрос
+        :param on_text: если задан, то ответ LLM отдается в него по частям,
+            ответ из кэша - целиком
+
+        Эмбеддинг вопроса считается один раз: он ключ кэша
+        и он же используется для поиска по индексу.
+        """
+        if self.query_engine is None:
+            self.load()
+
+        embedding = self.index.service_context.embed_model.get_query_embedding(question)
+        # Если пока ждали LLM индекс обновился, старый ответ в кэш не попадет
+        generation = self.cache.generation
+        answer = self.cache.get(embedding)
+        if answer is None:
+            bundle = QueryBundle(query_str=prompt or question, embedding=embedding)
+            answer = self.query(bundle) if on_text is None else self.stream(bundle, on_text)
+            self.cache.set(embedding, answer, generation)
+        elif on_text is not None:
+            on_text(answer)
+        return answer
+
+    def stats(self) -> dict:
+        steady = self._steady_total / (self.queries - 1) if self.queries > 1 else None
+        return {
+            "loaded": self.query_engine is not None,
+            "load_time": self.load_time,
+            "queries": self.queries,
+            "first_latency": self.first_latency,
+            "steady_latency": steady,
+            "first_token": self._ttfb_total / self.streams if self.streams else None
+        }
+
+
+index_service = IndexService()
@@ -0,0 +1,70 @@
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, URLInputFile
+
+from DataBase.queries.orm import select_media, save_media
+from typing import Any, Awaitable, Callable, Union
+
+# Статичные картинки бота: ключ -> (адрес, имя файла)
+STATIC_MEDIA = {
+    "removed_goods": (
+        "https://fastly.picsum.photos/id/329/400/300.jpg?hmac=CwK66llmWRlHvdMJ_jhsKnCDRFAyBMngiuHWYLQvEfQ",
+        "remove_image.png"
+    )
+}
+
+
+class MediaCache:
+    """
+    Кэш file_id статичных картинок.
+
+    Картинка загружается в Telegram по адресу только один раз,
+    полученный file_id сохраняется в таблице media и дальше
+    отправляется вместо файла.
+    """
+
+    def __init__(self, assets: dict):
+        self.assets = assets
+        self._file_ids = None
+
+    async def file_id(self, key: str):
+        if self._file_ids is None:
+            self._file_ids = await select_media()
+        return self._file_ids.get(key)
+
+    def upload_file(self, key: str) -> URLInputFile:
+        url, filename = self.assets[key]
+        return URLInputFile(url=url, filename=filename)
+
+    async def remember(self, key: str, result: Any):
+        # Сохраняем file_id из ответа Telegram, если в нем есть фотография
+        if isinstance(result, Message) and result.photo:
+            file_id = result.photo[-1].file_id
+            self._file_ids[key] = file_id
+            await save_media(key, file_id)
+
+    async def use(self, key: str, send: Callable[[Union[str, URLInputFile]], Awaitable[Any]]) -> Any:
+        """
+        Вызывает send с картинкой key и возвращает его результат
+
+        :param key: ключ картинки из STATIC_MEDIA
+        :param send: функция, которая отправляет картинку, например edit_message_media
+
+        Если сохраненный file_id больше не действует,
+        картинка загружается заново.
+        """
+        file_id = await self.file_id(key)
+
+        if file_id is not None:
+            try:
+                return await send(file_id)
+            except TelegramBadRequest as error:
+                if "file" not in error.message.lower():
+                    raise
+                del self._file_ids[key]
+
+        result = await send(self.upload_file(key))
+        await self.remember(key, result)
+        return result
+
+
+media_cache = MediaCache(STATIC_MEDIA)
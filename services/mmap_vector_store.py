@@ -0,0 +1,229 @@
+from llama_index.schema import BaseNode
+from llama_index.vector_stores.simple import SimpleVectorStore
+from llama_index.vector_stores.types import (
+    VectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult
+)
+from llama_index.vector_stores.utils import node_to_metadata_dict
+
+from pathlib import Path
+from typing import Any, List, Optional
+import json
+import logging
+import os
+import uuid
+
+import numpy as np
+
+# Матрица без версии в имени - формат до версионных файлов
+VECTORS_FNAME = "vector_store.npy"
+META_FNAME = "vector_store.meta.json"
+JSON_FNAME = "vector_store.json"
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Хранилище эмбеддингов для StorageContext из llama_index.
+
+    Векторы лежат одной матрицей float32 в файле .npy и открываются
+    через memory map: при запуске ничего не разбирается, страницы
+    читаются с диска по мере надобности. Поиск top-k - одно
+    матричное умножение вместо цикла по векторам в SimpleVectorStore.
+    ID узлов и метаданные хранятся рядом в небольшом json файле.
+
+    Каждое сохранение пишет матрицу в новый файл vector_store.<версия>.npy,
+    а json файл указывает, какой из них текущий. Открытая через memory map
+    матрица не перезаписывается (на Windows это невозможно), загрузка
+    после сохранения видит новую версию по json файлу.
+    """
+
+    stores_text: bool = False
+    is_embedding_query: bool = True
+
+    def __init__(
+            self,
+            vectors: Optional[np.ndarray] = None,
+            node_ids: Optional[List[str]] = None,
+            ref_doc_ids: Optional[List[str]] = None,
+            metadata: Optional[dict] = None
+    ):
+        self._vectors = vectors
+        self._node_ids = node_ids or []
+        self._ref_doc_ids = ref_doc_ids or []
+        self._metadata = metadata or {}
+        self._norms = None
+
+    @property
+    def client(self) -> None:
+        return None
+
+    @property
+    def size(self) -> int:
+        # Не __len__: StorageContext проверяет хранилище через "vector_store or ..."
+        return len(self._node_ids)
+
+    def _set_vectors(self, vectors: Optional[np.ndarray]):
+        self._vectors = vectors
+        self._norms = None
+
+    def add(self, nodes: List[BaseNode]) -> List[str]:
+        if not nodes:
+            return []
+
+        # Матрица из файла только для чтения, поэтому добавление создает новую в памяти
+        added = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        if self._vectors is None or not len(self._vectors):
+            self._set_vectors(added)
+        else:
+            self._set_vectors(np.vstack([self._vectors, added]))
+
+        for node in nodes:
+            self._node_ids.append(node.node_id)
+            self._ref_doc_ids.append(node.ref_doc_id or "None")
+            metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+            metadata.pop("_node_content", None)
+            self._metadata[node.node_id] = metadata
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        keep = np.array([doc_id != ref_doc_id for doc_id in self._ref_doc_ids], dtype=bool)
+        if keep.all():
+            return
+
+        for node_id, kept in zip(self._node_ids, keep):
+            if not kept:
+                self._metadata.pop(node_id, None)
+        self._node_ids = [node_id for node_id, kept in zip(self._node_ids, keep) if kept]
+        self._ref_doc_ids = [doc_id for doc_id, kept in zip(self._ref_doc_ids, keep) if kept]
+        self._set_vectors(np.array(self._vectors[keep]))
+
+    def _mask(self, query: VectorStoreQuery) -> Optional[np.ndarray]:
+        # Строки, подходящие под node_ids и фильтры по метаданным, None - все
+        if query.node_ids is None and query.filters is None:
+            return None
+
+        allowed = set(query.node_ids) if query.node_ids is not None else None
+        filters = query.filters.filters if query.filters is not None else []
+        return np.array([
+            (allowed is None or node_id in allowed) and all(
+                self._metadata.get(node_id, {}).get(filter_.key) == filter_.value for filter_ in filters
+            )
+            for node_id in self._node_ids
+        ], dtype=bool)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"MmapVectorStore поддерживает только режим default, а не {query.mode}")
+        if not self._node_ids:
+            return VectorStoreQueryResult(similarities=[], ids=[])
+
+        if self._norms is None:
+            self._norms = np.linalg.norm(self._vectors, axis=1)
+
+        embedding = np.asarray(query.query_embedding, dtype=np.float32)
+        # Косинусное сходство, как default_similarity_fn у SimpleVectorStore
+        similarities = (self._vectors @ embedding) / np.maximum(self._norms * np.linalg.norm(embedding), 1e-12)
+
+        mask = self._mask(query)
+        if mask is not None:
+            similarities = np.where(mask, similarities, -np.inf)
+            count = int(mask.sum())
+        else:
+            count = len(similarities)
+
+        top_k = min(query.similarity_top_k, count)
+        if top_k <= 0:
+            return VectorStoreQueryResult(similarities=[], ids=[])
+        top = np.argpartition(-similarities, top_k - 1)[:top_k]
+        top = top[np.argsort(-similarities[top])]
+
+        return VectorStoreQueryResult(
+            similarities=similarities[top].tolist(),
+            ids=[self._node_ids[row] for row in top]
+        )
+
+    def persist(self, persist_path: str, fs=None) -> None:
+        """
+        Сохраняет матрицу и метаданные в папку persist_path
+
+        StorageContext передает путь к vector_store.json,
+        из него берется только папка.
+        """
+        persist_dir = Path(persist_path).parent
+        persist_dir.mkdir(parents=True, exist_ok=True)
+
+        vectors = self._vectors if self._vectors is not None else np.empty((0, 0), dtype=np.float32)
+        # Новая матрица в новый файл, json с ее именем заменяется одной операцией
+        vectors_fname = f"vector_store.{uuid.uuid4().hex[:12]}.npy"
+        with open(persist_dir / vectors_fname, "wb") as file:
+            np.save(file, np.ascontiguousarray(vectors, dtype=np.float32))
+        tmp_meta = persist_dir / (META_FNAME + ".tmp")
+        tmp_meta.write_text(json.dumps({
+            "vectors": vectors_fname,
+            "node_ids": self._node_ids,
+            "ref_doc_ids": self._ref_doc_ids,
+            "metadata": self._metadata
+        }), encoding="utf-8")
+        os.replace(tmp_meta, persist_dir / META_FNAME)
+
+        remove_old_vectors(persist_dir, keep=vectors_fname)
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str | Path) -> "MmapVectorStore":
+        """
+        Открывает матрицу из persist_dir через memory map
+
+        Если в папке только старый vector_store.json,
+        то он один раз конвертируется в новый формат.
+        """
+        persist_dir = Path(persist_dir)
+        if not (persist_dir / META_FNAME).exists() and (persist_dir / JSON_FNAME).exists():
+            convert_json_store(persist_dir)
+
+        meta = json.loads((persist_dir / META_FNAME).read_text(encoding="utf-8"))
+        vectors = np.load(persist_dir / meta.get("vectors", VECTORS_FNAME), mmap_mode="r")
+        return cls(
+            vectors=vectors if vectors.size else None,
+            node_ids=meta["node_ids"],
+            ref_doc_ids=meta["ref_doc_ids"],
+            metadata=meta["metadata"]
+        )
+
+    @classmethod
+    def from_simple(cls, store: SimpleVectorStore) -> "MmapVectorStore":
+        data = store._data
+        node_ids = list(data.embedding_dict)
+        vectors = np.asarray([data.embedding_dict[node_id] for node_id in node_ids], dtype=np.float32)
+        return cls(
+            vectors=vectors if node_ids else None,
+            node_ids=node_ids,
+            ref_doc_ids=[data.text_id_to_ref_doc_id.get(node_id, "None") for node_id in node_ids],
+            metadata={node_id: (data.metadata_dict or {}).get(node_id, {}) for node_id in node_ids}
+        )
+
+
+def remove_old_vectors(persist_dir: Path, keep: str):
+    """
+    Удаляет прежние версии матрицы
+
+    Файл, который еще открыт через memory map, на Windows удалить
+    нельзя, он останется до следующего сохранения. На Linux и macOS
+    открытая матрица продолжает работать и после удаления файла.
+    """
+    for path in persist_dir.glob("vector_store*.npy"):
+        if path.name == keep:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            logging.debug("Старая матрица %s еще открыта, удалится позже", path.name)
+
+
+def convert_json_store(persist_dir: str | Path):
+    # Переводит vector_store.json из SimpleVectorStore в формат MmapVectorStore
+    persist_dir = Path(persist_dir)
+    store = MmapVectorStore.from_simple(SimpleVectorStore.from_persist_dir(str(persist_dir)))
+    store.persist(str(persist_dir / JSON_FNAME))
+    logging.info("vector_store.json конвертирован в %s, векторов: %s", META_FNAME, store.size)
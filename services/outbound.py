@@ -0,0 +1,221 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from heapq import heappush, heappop
+from itertools import count
+import asyncio
+import logging
+import os
+import time
+
+# Полосы приоритета: чем меньше число, тем раньше уходит запрос
+INTERACTIVE = 0
+BULK = 1
+
+send_lane: ContextVar[int] = ContextVar("send_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends():
+    """
+    Все запросы внутри блока идут по полосе BULK
+    и пропускают вперед ответы на действия пользователей.
+    """
+    token = send_lane.set(BULK)
+    try:
+        yield
+    finally:
+        send_lane.reset(token)
+
+
+class TokenBucket:
+    """
+    Ведро токенов: rate токенов в секунду, не больше capacity подряд.
+    blocked_until задается после RetryAfter от Telegram.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        # Сколько ждать до следующего токена, 0 - можно отправлять
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def block(self, now: float, seconds: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0
+
+
+class RateGate:
+    """
+    Ведро токенов с очередью ожидающих.
+    Токены раздаются в порядке (полоса, время прихода).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.bucket = TokenBucket(rate, capacity)
+        self._waiters: list = []
+        self._order = count()
+        self._dispatcher = None
+
+    def __len__(self) -> int:
+        return len(self._waiters)
+
+    def is_idle(self) -> bool:
+        # Полное ведро без очереди и блокировки ничем не отличается от нового
+        now = time.monotonic()
+        return not self._waiters and self.bucket.wait_time(now) == 0 and self.bucket.tokens >= self.bucket.capacity
+
+    async def acquire(self, lane: int):
+        if not self._waiters and self.bucket.wait_time(time.monotonic()) == 0:
+            self.bucket.consume()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heappush(self._waiters, (lane, next(self._order), waiter))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await waiter
+
+    async def _dispatch(self):
+        try:
+            while self._waiters:
+                wait = self.bucket.wait_time(time.monotonic())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                _, _, waiter = heappop(self._waiters)
+                if not waiter.done():
+                    self.bucket.consume()
+                    waiter.set_result(None)
+        finally:
+            self._dispatcher = None
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """
+    Планировщик исходящих запросов к Bot API.
+
+    Подключается как middleware сессии бота, поэтому хэндлеры
+    продолжают вызывать answer/answer_photo как обычно.
+    Запрос с chat_id ждет токен в очереди своего чата, затем
+    в общей очереди бота, обе очереди пропускают полосу
+    INTERACTIVE раньше BULK. При TelegramRetryAfter чат и общая
+    очередь бота блокируются на указанное время (из ответа не
+    понять, превышен лимит чата или всего бота), и запрос повторяется.
+    """
+
+    def __init__(
+            self,
+            global_rate: float = 30,
+            chat_rate: float = 1,
+            chat_burst: float = 3,
+            group_rate: float = 20 / 60,
+            max_retries: int = 3
+    ):
+        # Без запаса в ведре бота, иначе за секунду можно отправить больше global_rate
+        self.global_gate = RateGate(global_rate, 1)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+
+        self._chats: dict = {}
+
+        self.sent = 0
+        self.retried = 0
+        self.max_wait = 0.0
+
+    def _chat_gate(self, chat_id) -> RateGate:
+        gate = self._chats.get(chat_id)
+        if gate is None:
+            if len(self._chats) > 10000:
+                self._forget_idle_chats()
+            # Отрицательный ID у групп и каналов, для них лимит строже
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            gate = self._chats[chat_id] = RateGate(rate, self.chat_burst)
+        return gate
+
+    def _forget_idle_chats(self):
+        for chat_id, gate in list(self._chats.items()):
+            if gate.is_idle():
+                del self._chats[chat_id]
+
+    async def acquire(self, chat_id, lane: int = INTERACTIVE):
+        # Ждет разрешения на отправку в чат chat_id
+        started = time.monotonic()
+
+        await self._chat_gate(chat_id).acquire(lane)
+        await self.global_gate.acquire(lane)
+
+        self.max_wait = max(self.max_wait, time.monotonic() - started)
+
+    def retry_after(self, chat_id, seconds: float):
+        now = time.monotonic()
+        self._chat_gate(chat_id).bucket.block(now, seconds)
+        # Иначе остальные чаты продолжат слать запросы и тоже получат 429
+        self.global_gate.bucket.block(now, seconds)
+
+    def stats(self) -> dict:
+        return {
+            "queue": len(self.global_gate) + sum(len(gate) for gate in self._chats.values()),
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "retried": self.retried,
+            "max_wait": self.max_wait
+        }
+
+    async def __call__(
+            self,
+            make_request: NextRequestMiddlewareType[TelegramType],
+            bot: Bot,
+            method: TelegramMethod[TelegramType]
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        # getUpdates, answerCallbackQuery и т.п. не отправляют сообщений в чат
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        lane = send_lane.get()
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(chat_id, lane)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                if attempt == self.max_retries:
+                    raise
+                logging.warning("RetryAfter %s с для чата %s, повтор %s", error.retry_after, chat_id, attempt + 1)
+                self.retried += 1
+                self.retry_after(chat_id, error.retry_after)
+                continue
+
+            self.sent += 1
+            return response
+
+
+outbound_scheduler = OutboundScheduler(
+    global_rate=float(os.getenv("SEND_RATE", 30)),
+    chat_rate=float(os.getenv("CHAT_SEND_RATE", 1)),
+    chat_burst=float(os.getenv("CHAT_SEND_BURST", 3))
+)
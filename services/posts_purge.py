@@ -0,0 +1,96 @@
+from DataBase.models import utc_now
+from DataBase.queries.orm import purge_posts
+
+from datetime import timedelta
+from typing import Optional
+import asyncio
+import logging
+import os
+import time
+
+# Сколько секунд хранятся строки posts (кнопки режима удаления), по умолчанию 7 дней
+POSTS_TTL = float(os.getenv("POSTS_TTL", 7 * 24 * 3600))
+POSTS_PURGE_INTERVAL = float(os.getenv("POSTS_PURGE_INTERVAL", 3600))
+POSTS_PURGE_BATCH = int(os.getenv("POSTS_PURGE_BATCH", 1000))
+
+
+class PostsPurger:
+    """
+    Фоновая очистка таблицы posts.
+
+    Раз в interval секунд удаляет строки старше ttl пачками
+    по batch_size, между пачками отдает управление циклу событий.
+    Кнопки удаления в таких старых сообщениях перестают работать.
+    """
+
+    def __init__(
+            self,
+            ttl: float = POSTS_TTL,
+            interval: float = POSTS_PURGE_INTERVAL,
+            batch_size: int = POSTS_PURGE_BATCH
+    ):
+        self.ttl = ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+        self.purged = 0
+        self.runs = 0
+        self.last_purged = 0
+        self.last_time = None
+        self._time_total = 0.0
+
+    async def purge(self) -> int:
+        # Один проход очистки, возвращает количество удаленных строк
+        started = time.perf_counter()
+        before = utc_now() - timedelta(seconds=self.ttl)
+        purged = 0
+        while True:
+            deleted = await purge_posts(before, self.batch_size)
+            purged += deleted
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(0)
+
+        self.last_time = time.perf_counter() - started
+        self._time_total += self.last_time
+        self.last_purged = purged
+        self.purged += purged
+        self.runs += 1
+        if purged:
+            logging.info("Удалено старых строк posts: %s за %.2f с", purged, self.last_time)
+        return purged
+
+    async def _run(self):
+        while True:
+            try:
+                await self.purge()
+            except Exception:
+                # Ошибка базы не должна останавливать следующие проходы
+                logging.exception("Ошибка очистки таблицы posts")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "purged": self.purged,
+            "last_purged": self.last_purged,
+            "last_time": self.last_time,
+            "rows_per_second": self.purged / self._time_total if self._time_total else None
+        }
+
+
+posts_purger = PostsPurger()
@@ -0,0 +1,113 @@
+from typing import Optional, Sequence
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Кэш ответов ИИ по смыслу вопроса.
+
+    Ключ - эмбеддинг вопроса. Если косинусное сходство нового вопроса
+    с сохраненным не меньше threshold, возвращается сохраненный ответ.
+    Записи живут ttl секунд, при переполнении вытесняется та,
+    которую дольше всех не использовали. Вызывается из потоков ai_executor.
+
+    generation меняется при каждом clear(): ответ, полученный
+    по старому индексу, не сохраняется, если кэш очистили,
+    пока ждали LLM.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600, maxsize: int = 512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.clear()
+
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._vectors = None
+            self._answers = []
+            self._created = np.empty(0)
+            self._used = np.empty(0)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, keep: np.ndarray):
+        self._vectors = self._vectors[keep]
+        self._answers = [answer for answer, kept in zip(self._answers, keep) if kept]
+        self._created = self._created[keep]
+        self._used = self._used[keep]
+
+    def get(self, embedding: Sequence[float]) -> Optional[str]:
+        if not self.maxsize:
+            return None
+
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if self._answers:
+                if self._created[0] < now - self.ttl:
+                    self._drop(self._created >= now - self.ttl)
+
+            if self._answers:
+                # Векторы нормированы, поэтому скалярное произведение - косинус
+                similarity = self._vectors @ vector
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.threshold:
+                    self._used[best] = now
+                    self.hits += 1
+                    return self._answers[best]
+
+            self.misses += 1
+            return None
+
+    def set(self, embedding: Sequence[float], answer: str, generation: Optional[int] = None):
+        if not self.maxsize:
+            return
+
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if len(self._answers) >= self.maxsize:
+                keep = np.ones(len(self._answers), dtype=bool)
+                keep[np.argmin(self._used)] = False
+                self._drop(keep)
+
+            if self._vectors is None:
+                self._vectors = vector[None, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._answers.append(answer)
+            self._created = np.append(self._created, now)
+            self._used = np.append(self._used, now)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._answers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0
+        }
+
+
+answer_cache = SemanticCache(
+    threshold=float(os.getenv("AI_CACHE_THRESHOLD", 0.95)),
+    ttl=float(os.getenv("AI_CACHE_TTL", 3600)),
+    maxsize=int(os.getenv("AI_CACHE_SIZE", 512))
+)
@@ -0,0 +1,105 @@
+from llama_index.indices.struct_store import NLSQLTableQueryEngine
+from sqlalchemy.engine import Engine
+
+from DataBase.database import readonly_engine
+from DataBase.queries.cache import QueryCache
+from services.sql_guard import GuardedSQLDatabase
+
+from typing import Optional
+import logging
+import os
+import re
+import threading
+
+
+def normalize_request(question: str) -> str:
+    # Одинаковые по смыслу формулировки: регистр, знаки препинания, лишние пробелы
+    words = re.findall(r"[\w-]+", question.lower().replace("ё", "е"))
+    return " ".join(words)
+
+
+class SQLAssistant:
+    """
+    Режим "Запрос о товаре": вопрос на естественном языке в SQL.
+
+    SQLDatabase (с отражением схемы таблиц) и NLSQLTableQueryEngine
+    создаются один раз. Сгенерированный LLM SQL запоминается по
+    нормализованному тексту вопроса вместе со строками результата
+    и ответом LLM. Повторный вопрос сразу выполняет сохраненный
+    запрос, и если строки не изменились, то отдает тот же ответ
+    без обращения к LLM, иначе ответ строится заново.
+    Запросы выполняет GuardedSQLDatabase на движке только для чтения.
+    """
+
+    def __init__(
+            self,
+            engine: Engine = readonly_engine,
+            tables: tuple = ("goods",),
+            cache: Optional[QueryCache] = None,
+            service_context=None
+    ):
+        self.engine = engine
+        self.tables = list(tables)
+        self.cache = cache if cache is not None else QueryCache(maxsize=256, ttl=86400)
+        self._service_context = service_context
+        self._lock = threading.Lock()
+        self.sql_database = None
+        self.query_engine = None
+
+    def load(self):
+        with self._lock:
+            if self.query_engine is None:
+                self.sql_database = GuardedSQLDatabase(self.engine, include_tables=self.tables)
+                self.query_engine = NLSQLTableQueryEngine(
+                    self.sql_database, tables=self.tables, service_context=self._service_context
+                )
+
+    def _cached(self, key: tuple) -> Optional[tuple]:
+        # (sql, строки результата, ответ)
+        with self._lock:
+            found, item = self.cache.get(key)
+        return item if found else None
+
+    def answer(self, question: str, prompt: Optional[str] = None) -> str:
+        """
+        :param question: текст пользователя, ключ кэша SQL
+        :param prompt: полный запрос к LLM, по умолчанию сам вопрос
+        """
+        if self.query_engine is None:
+            self.load()
+
+        key = ("sql", normalize_request(question))
+        cached = self._cached(key)
+        if cached is not None:
+            sql, rows, answer = cached
+            try:
+                _, metadata = self.sql_database.run_sql(sql)
+                # Ответ LLM верен, пока товары в результате те же
+                if list(metadata.get("result", [])) == rows:
+                    return answer
+            except NotImplementedError:
+                # Схема могла измениться, тогда SQL генерируется заново
+                logging.warning("Сохраненный SQL больше не выполняется: %s", sql)
+
+        response = self.query_engine.query(prompt or question)
+        metadata = response.metadata or {}
+        sql = metadata.get("sql_query")
+        # Запоминаем только SQL, который прошел проверку и выполнился
+        if sql and "result" in metadata:
+            with self._lock:
+                self.cache.set(key, (sql, list(metadata["result"]), response.response))
+        return response.response
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        if self.sql_database is not None:
+            stats.update(self.sql_database.stats())
+        return stats
+
+
+sql_assistant = SQLAssistant(
+    cache=QueryCache(
+        maxsize=int(os.getenv("SQL_CACHE_SIZE", 256)),
+        ttl=float(os.getenv("SQL_CACHE_TTL", 86400))
+    )
+)
@@ -0,0 +1,138 @@
+from llama_index import SQLDatabase
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from DataBase.database import SQL_TIMEOUT
+
+from typing import Dict, Tuple
+import logging
+import os
+import re
+import time
+
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", 50))
+# Запросы дольше этого времени попадают в лог как предупреждения
+SQL_SLOW_LOG = float(os.getenv("SQL_SLOW_LOG", 1))
+
+FORBIDDEN = re.compile(
+    r"\b(insert|update|delete|merge|drop|alter|create|truncate|rename|grant|revoke|"
+    r"attach|detach|pragma|vacuum|reindex|call|exec|execute|handler|load|load_file|lock|unlock|set|"
+    r"outfile|dumpfile|sleep|benchmark)\b"
+)
+# LIMIT count, LIMIT count OFFSET offset или LIMIT offset, count (MySQL) в конце запроса
+LIMIT = re.compile(r"\blimit\s+(?:(\d+)\s*,\s*(\d+)|(\d+)(?:\s+offset\s+\d+)?)\s*$")
+
+
+class UnsafeSQLError(ValueError):
+    pass
+
+
+# Литералы и комментарии разбираются одним проходом слева направо,
+# поэтому "--" и "#" внутри строки не считаются комментарием
+TOKENS = re.compile(
+    r"(?P<literal>'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\")|(?P<comment>/\*.*?\*/|--[^\n]*|#[^\n]*)",
+    flags=re.S
+)
+
+
+def strip_comments(sql: str) -> str:
+    return TOKENS.sub(lambda match: match.group("literal") or " ", sql).strip()
+
+
+def strip_literals(sql: str) -> str:
+    # Слова внутри строковых литералов не должны влиять на проверку
+    return TOKENS.sub(lambda match: "''" if match.group("literal") else " ", sql)
+
+
+def guard_sql(sql: str, max_rows: int = SQL_MAX_ROWS) -> str:
+    """
+    Проверяет SQL от LLM и ограничивает количество строк
+
+    Разрешен только один SELECT (в том числе с WITH).
+    Если LIMIT нет, то он добавляется, а запрос с большим LIMIT
+    (или LIMIT, который не удалось разобрать) оборачивается
+    в подзапрос с LIMIT max_rows.
+    """
+    sql = strip_comments(sql).rstrip(";").strip()
+    code = strip_literals(sql).lower()
+
+    if ";" in code:
+        raise UnsafeSQLError("Разрешен только один запрос")
+    if not re.match(r"^(select|with)\b", code.lstrip("( ")):
+        raise UnsafeSQLError("Разрешены только запросы SELECT")
+    forbidden = FORBIDDEN.search(code) or re.search(r"\bfor\s+(update|share)\b", code)
+    if forbidden:
+        raise UnsafeSQLError(f"Запрещенная операция: {forbidden.group(0)}")
+
+    limit = LIMIT.search(code)
+    if limit is None and not re.search(r"\blimit\b", code):
+        return f"{sql} LIMIT {max_rows}"
+    if limit is None or int(limit.group(2) or limit.group(3)) > max_rows:
+        return f"SELECT * FROM ({sql}) AS limited LIMIT {max_rows}"
+    return sql
+
+
+class GuardedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase для запросов, которые генерирует LLM.
+
+    Работает на движке только для чтения (readonly_engine),
+    пропускает только SELECT с ограничением LIMIT, прерывает запросы
+    дольше SQL_TIMEOUT и пишет в лог каждый запрос с временем выполнения.
+    """
+
+    def __init__(self, *args, max_rows: int = SQL_MAX_ROWS, timeout: float = SQL_TIMEOUT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.rejected = 0
+        self.failed = 0
+        self.slow = 0
+
+    def _set_deadline(self, connection, deadline):
+        # У MySQL время ограничивает MAX_EXECUTION_TIME сессии, у sqlite - обработчик прогресса
+        if self._engine.dialect.name != "sqlite":
+            return
+        dbapi_connection = connection.connection.driver_connection
+        if deadline is None:
+            dbapi_connection.set_progress_handler(None, 0)
+        else:
+            dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+
+    def run_sql(self, command: str) -> Tuple[str, Dict]:
+        try:
+            sql = guard_sql(command, self.max_rows)
+        except UnsafeSQLError as error:
+            self.rejected += 1
+            logging.warning("SQL от LLM отклонен (%s): %s", error, command)
+            raise
+
+        started = time.perf_counter()
+        with self._engine.connect() as connection:
+            self._set_deadline(connection, time.monotonic() + self.timeout)
+            try:
+                cursor = connection.execute(text(sql))
+                # guard_sql уже ограничил LIMIT, fetchmany - на случай, если ограничение обошли
+                rows = cursor.fetchmany(self.max_rows) if cursor.returns_rows else []
+                columns = list(cursor.keys()) if cursor.returns_rows else []
+            except DBAPIError as error:
+                self.failed += 1
+                logging.warning("SQL от LLM не выполнен за %.2f с: %s (%s)", time.perf_counter() - started, sql, error)
+                raise NotImplementedError(f"Statement {sql!r} is invalid SQL.") from error
+            finally:
+                self._set_deadline(connection, None)
+                connection.rollback()
+
+        runtime = time.perf_counter() - started
+        if runtime > SQL_SLOW_LOG:
+            self.slow += 1
+            logging.warning("Медленный SQL от LLM: %.2f с, %s строк: %s", runtime, len(rows), sql)
+        else:
+            logging.info("SQL от LLM: %.3f с, %s строк: %s", runtime, len(rows), sql)
+
+        if not columns:
+            return "", {}
+        return str(rows), {"result": rows, "col_keys": columns}
+
+    def stats(self) -> dict:
+        return {"rejected": self.rejected, "failed": self.failed, "slow": self.slow}
@@ -0,0 +1,120 @@
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, InlineKeyboardMarkup
+
+from typing import Optional
+import asyncio
+import logging
+import os
+import time
+
+# 0 - ответ ИИ отправляется одним сообщением после полной генерации
+STREAMING = os.getenv("AI_STREAMING", "1") != "0"
+# Telegram не дает редактировать одно сообщение чаще примерно раза в секунду
+EDIT_INTERVAL = float(os.getenv("AI_EDIT_INTERVAL", 1))
+MESSAGE_LIMIT = 4096
+CURSOR = " ▌"
+# Telegram не принимает пустой текст сообщения
+EMPTY_ANSWER = "Не удалось получить ответ, попробуйте спросить иначе"
+
+
+class StreamMetrics:
+    """
+    Время до первого видимого текста (TTFB) и до полного ответа
+    """
+
+    def __init__(self):
+        self.answers = 0
+        self.ttfb_total = 0.0
+        self.ttfb_max = 0.0
+        self.total = 0.0
+
+    def record(self, ttfb: Optional[float], total: float):
+        self.answers += 1
+        self.total += total
+        if ttfb is not None:
+            self.ttfb_total += ttfb
+            self.ttfb_max = max(self.ttfb_max, ttfb)
+
+    def stats(self) -> dict:
+        return {
+            "answers": self.answers,
+            "avg_ttfb": self.ttfb_total / self.answers if self.answers else None,
+            "max_ttfb": self.ttfb_max if self.answers else None,
+            "avg_total": self.total / self.answers if self.answers else None
+        }
+
+
+stream_metrics = StreamMetrics()
+
+
+class MessageStreamer:
+    """
+    Показывает ответ ИИ по мере генерации, редактируя одно сообщение.
+
+    feed() вызывается из потока ai_executor для каждого нового куска текста.
+    Правки идут не чаще interval секунд и только если текст изменился,
+    последняя правка в finish() добавляет кнопки.
+
+    :param message: сообщение-заглушка, которое будет редактироваться
+    :param started: время получения вопроса (time.monotonic) для подсчета TTFB
+    """
+
+    def __init__(self, message: Message, started: Optional[float] = None, interval: float = EDIT_INTERVAL):
+        self.message = message
+        self.started = started or time.monotonic()
+        self.interval = interval
+        self.text = ""
+        self.ttfb = None
+        self.edits = 0
+        self._shown = ""
+        self._changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._edit_loop())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def feed(self, delta: str):
+        # Вызывается из другого потока, поэтому изменения передаются в цикл событий
+        self._loop.call_soon_threadsafe(self._append, delta)
+
+    def _append(self, delta: str):
+        self.text += delta
+        self._changed.set()
+
+    async def _edit(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        try:
+            await self.message.edit_text(text=text[:MESSAGE_LIMIT], reply_markup=reply_markup)
+        except TelegramBadRequest as error:
+            # Тот же текст, что уже показан - не ошибка
+            if "not modified" not in str(error):
+                raise
+        self.edits += 1
+        if self.ttfb is None:
+            self.ttfb = time.monotonic() - self.started
+
+    async def _edit_loop(self):
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            text = self.text.strip()
+            if text and text != self._shown:
+                await self._edit(text[:MESSAGE_LIMIT - len(CURSOR)] + CURSOR)
+                self._shown = text
+            await asyncio.sleep(self.interval)
+
+    async def finish(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        # Полный ответ и кнопки одной последней правкой,
+        # повтор уже показанного текста _edit пропускает
+        await self._edit(text.strip() or EMPTY_ANSWER, reply_markup=reply_markup)
+        total = time.monotonic() - self.started
+        stream_metrics.record(self.ttfb, total)
+        logging.info("Ответ ИИ: первый текст через %.2f с, полный через %.2f с, правок %s", self.ttfb, total, self.edits)
@@ -0,0 +1,102 @@
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from typing import Any, Dict, Optional
+import asyncio
+import time
+
+
+class ConcurrentRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука с ограничением на число одновременных апдейтов.
+
+    Telegram сразу получает ответ 200, а апдейт обрабатывается в фоне.
+    Не больше concurrency апдейтов выполняются одновременно,
+    остальные ждут своей очереди и видны в stats() как pending.
+    При остановке сервера дожидается уже принятых апдейтов.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, concurrency: int = 50, **kwargs: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Ссылки на фоновые задачи, иначе их может собрать сборщик мусора
+        self._tasks: set = set()
+
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                await super()._background_feed_update(bot=bot, update=update)
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.processed += 1
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await super().close()
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "pending": len(self._tasks) - self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "uptime": round(time.monotonic() - self.started, 1)
+        }
+
+
+async def health(request: web.Request) -> web.Response:
+    # Проверка живости для балансировщика и мониторинга
+    handler: ConcurrentRequestHandler = request.app["webhook_handler"]
+    return web.json_response({"status": "ok", **handler.stats()})
+
+
+def create_webhook_app(
+        dispatcher: Dispatcher,
+        bot: Bot,
+        path: str = "/webhook",
+        concurrency: int = 50,
+        secret_token: Optional[str] = None
+) -> web.Application:
+    """
+    Собирает aiohttp приложение для режима вебхука
+
+    :param dispatcher: диспетчер с подключенными роутерами
+    :param bot: бот, которому приходят апдейты
+    :param path: путь, на который Telegram отправляет апдейты
+    :param concurrency: сколько апдейтов обрабатываются одновременно
+    :param secret_token: секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+    """
+    app = web.Application()
+    handler = ConcurrentRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        concurrency=concurrency,
+        secret_token=secret_token
+    )
+    # Сначала регистрируем обработчик, чтобы при остановке он дождался
+    # апдейтов раньше, чем диспетчер закроет соединения с базой
+    handler.register(app, path=path)
+    app["webhook_handler"] = handler
+    app.router.add_get("/health", health)
+    setup_application(app, dispatcher, bot=bot)
+    return app